@@ -3,74 +3,110 @@
 Accurate DDR bandwidth test - removes Python/USB overhead
 
 Strategy:
-1. Run small test (1MB) to measure overhead
+1. Time back-to-back register reads/writes to measure USB overhead
 2. Run large test (512MB) multiple times
-3. Subtract overhead to get true DDR performance
+3. Subtract each run's start write and status polls, costed with a
+   calibration taken just before that run, to get true DDR performance
 """
 
 from usb_ddr_control import USBDDRControl
 import time
+import statistics
 import sys
+import traceback
 
-def run_test(usb, size_mb, pattern_type='lfsr'):
+# High-resolution monotonic clock for all host-side timing
+_now = time.perf_counter
+
+# Rough DDR throughput used only to pace completion polling in run_test
+EXPECTED_BYTES_PER_SEC = 8e9
+
+def run_test(usb, size_mb, pattern_type='lfsr', configure=True):
     """
     Run a single memory test and measure time
 
+    Args:
+        configure: False to reuse the registers left by the previous run
+                   and only pulse start (repeat runs of one config)
+
     Returns:
         (passed, elapsed_time)
     """
-    # Stop any running test
-    usb.memtest_stop()
-    time.sleep(0.01)
-
-    # Configure test
-    if pattern_type == 'fixed':
-        usb.reg_write(0x10, 0xDEADBEEF)  # REG_4_DATA_L
-        usb.reg_write(0x14, 0xCAFEBABE)  # REG_5_DATA_H
-        usb.reg_write(0x18, 0)           # REG_6_LFSR = 0
-    else:
-        usb.reg_write(0x18, 1)           # REG_6_LFSR = 1
-
-    # Set size
-    size_bytes = size_mb * 1024 * 1024
-    usb.reg_write(0x24, size_bytes)  # REG_9_SIZE
-
-    # Start test
-    usb.reg_write(0x08, 0x00)
-    time.sleep(0.005)
-
-    start_time = time.time()
+    size_bytes = size_mb << 20
+
+    # Stop any running test, then configure, in one USB transfer. The stop
+    # goes first so the config writes never land under a running test.
+    # Repeat runs of the same config skip straight to the start pulse; the
+    # memtest registers hold their values across memtest_stop
+    setup = [(0x08, 0x00)]  # REG_2_CONTROL: clear start and memtest_rstn
+    if configure:
+        # Configure pattern and size
+        if pattern_type == 'fixed':
+            setup += [(0x10, 0xDEADBEEF),  # REG_4_DATA_L
+                      (0x14, 0xCAFEBABE),  # REG_5_DATA_H
+                      (0x18, 0)]           # REG_6_LFSR = 0
+        else:
+            setup.append((0x18, 1))        # REG_6_LFSR = 1
+
+        # Set size
+        setup.append((0x24, size_bytes))  # REG_9_SIZE
+
+    usb.reg_write_bulk(setup)
+    usb.poll_until(0x04, 0x1, 0x0, timeout=1.0)  # done clears once the checker is in reset
+
+    start_time = _now()
+    deadline = start_time + 120.0
     usb.reg_write(0x08, 0x03)  # Start test
 
-    # Poll for completion with minimal overhead
+    # Poll for completion with adaptive backoff: hold off for about half the
+    # expected write+read time, then grow by 1.5x capped at 5ms, so long
+    # tests don't flood the bus with status reads while completion is still
+    # seen within 5ms
+    delay = max(0.00005, 2 * size_bytes / EXPECTED_BYTES_PER_SEC * 0.5)
     poll_count = 0
     while True:
-        status = usb.reg_read(0x04)
-        done = status & 0x1
-        fail = (status >> 1) & 0x1
+        done_fail = usb.reg_read(0x04) & 0x3  # bit0=done, bit1=fail
         poll_count += 1
 
-        if done:
-            elapsed = time.time() - start_time
-
-            if fail:
-                dq_fail = usb.reg_read(0x00)
-                return False, elapsed, poll_count
-            else:
-                return True, elapsed, poll_count
+        if done_fail & 0x1:
+            elapsed = _now() - start_time
+            return not (done_fail & 0x2), elapsed, poll_count
 
         # Safety timeout
-        if time.time() - start_time > 120.0:
+        if _now() > deadline:
             return False, 120.0, poll_count
 
-        time.sleep(0.0001)  # 100us poll interval
+        time.sleep(delay)
+        delay = min(delay * 1.5, 0.005)
+
+def calibrate_usb_overhead(usb, iters=1000):
+    """
+    Measure the host cost of one status read and one control write
+
+    Runs with no memory test active, so unlike a small DDR test the result
+    contains no DDR time.
+
+    Returns:
+        (read_time, write_time) in seconds per call
+    """
+    start_time = _now()
+    for _ in range(iters):
+        usb.reg_read(0x04)
+    read_time = (_now() - start_time) / iters
+
+    start_time = _now()
+    for _ in range(iters):
+        usb.reg_write(0x08, 0x00)
+    write_time = (_now() - start_time) / iters
+
+    return read_time, write_time
 
 def main():
     print("=" * 70)
     print("DDR Bandwidth Test - Overhead Compensated")
     print("=" * 70)
 
-    usb = USBDDRControl()
+    usb = USBDDRControl.shared()
 
     try:
         # Check DDR ready
@@ -79,24 +115,23 @@ def main():
             print("ERROR: DDR not initialized (cfg_done=0)")
             return 1
 
-        print("DDR initialized and ready\n")
+        print("DDR initialized and ready")
+        print(f"Host timer: perf_counter, {time.get_clock_info('perf_counter').resolution*1e9:.0f} ns resolution\n")
 
-        # Step 1: Measure overhead with small test
-        print("Step 1: Measuring Python/USB overhead with 1MB test...")
-        print("-" * 70)
+        # Throwaway warm-up run so the first measured run doesn't pay for
+        # cold USB buffers and first-call Python overhead
+        passed, _, _ = run_test(usb, 4, pattern_type='lfsr')
+        if not passed:
+            print("FAILED - Warm-up test error")
+            return 1
 
-        overhead_times = []
-        for i in range(5):
-            passed, elapsed, polls = run_test(usb, 1, pattern_type='lfsr')
-            if not passed:
-                print(f"  Test {i+1} FAILED - Data verification error")
-                return 1
-            overhead_times.append(elapsed)
-            print(f"  Run {i+1}: {elapsed:.6f}s ({polls} polls) - PASS (data verified)")
+        # Step 1: Measure overhead of the USB accesses inside the timed region
+        print("Step 1: Measuring Python/USB overhead (1000 reads, 1000 writes)...")
+        print("-" * 70)
 
-        avg_overhead = sum(overhead_times) / len(overhead_times)
-        print(f"\nAverage 1MB time: {avg_overhead:.6f}s")
-        print(f"This includes: DDR transfer time + Python/USB overhead")
+        read_time, write_time = calibrate_usb_overhead(usb)
+        print(f"  Status read:   {read_time*1e6:.1f}us per call")
+        print(f"  Control write: {write_time*1e6:.1f}us per call")
 
         # Step 2: Run large tests
         print("\n" + "=" * 70)
@@ -104,16 +139,21 @@ def main():
         print("-" * 70)
 
         test_times = []
+        overhead_times = []
         for i in range(5):
-            passed, elapsed, polls = run_test(usb, 512, pattern_type='lfsr')
+            # Re-measure USB overhead right before each run and pair the two,
+            # so drift over the test series doesn't leave a stale estimate
+            read_time, write_time = calibrate_usb_overhead(usb, iters=200)
+            passed, elapsed, polls = run_test(usb, 512, pattern_type='lfsr', configure=(i == 0))
             if not passed:
                 print(f"  Test {i+1} FAILED - Data verification error")
                 return 1
 
             test_times.append(elapsed)
+            overhead_times.append(write_time + polls*read_time)  # start write + status polls
 
             # Calculate raw bandwidth (without compensation)
-            size_bytes = 512 * 1024 * 1024
+            size_bytes = 512 << 20
             total_bytes = 2 * size_bytes  # write + read
             bandwidth_raw_gbps = (total_bytes * 8) / elapsed / 1e9
 
@@ -125,59 +165,58 @@ def main():
         print("=" * 70)
 
         avg_512mb_time = sum(test_times) / len(test_times)
+        median_512mb_time = statistics.median(test_times)
         min_512mb_time = min(test_times)
         max_512mb_time = max(test_times)
+        q1, _, q3 = statistics.quantiles(test_times, n=4)
 
         print(f"\n512MB test times:")
         print(f"  Average: {avg_512mb_time:.6f}s")
+        print(f"  Median:  {median_512mb_time:.6f}s (IQR {(q3-q1)*1000:.3f}ms)")
         print(f"  Min:     {min_512mb_time:.6f}s (best case)")
         print(f"  Max:     {max_512mb_time:.6f}s (worst case)")
 
-        # Calculate bandwidth with overhead compensation
-        # Assume overhead scales linearly with size (conservative estimate)
-        # Overhead for 512MB = overhead_1mb * 512
-        estimated_overhead_512mb = avg_overhead * 512
-
-        # However, polling overhead doesn't scale linearly - it depends on poll count
-        # Better estimate: assume constant overhead per test
-        # Use the minimum time as it has least variance from other factors
-
-        print(f"\nEstimated overhead for 512MB: {estimated_overhead_512mb:.6f}s")
-        print(f"(This is likely an overestimate)")
+        # Calculate bandwidth with overhead compensation: each run's own
+        # start write and status polls come off its elapsed time
+        avg_overhead = sum(overhead_times) / len(overhead_times)
+        print(f"\nAverage USB overhead per run: {avg_overhead:.6f}s")
 
-        # Calculate compensated time (use best case time to minimize overhead impact)
-        compensated_time = min_512mb_time - avg_overhead
+        # Calculate compensated time (median run, so one lucky or unlucky
+        # run doesn't set the result)
+        compensated_time = statistics.median(t - o for t, o in zip(test_times, overhead_times))
 
         if compensated_time <= 0:
             print("\nWARNING: Overhead compensation resulted in negative time!")
             print("Using raw measurements instead.")
-            compensated_time = min_512mb_time
+            compensated_time = median_512mb_time
 
         print(f"\nCompensated time (512MB - overhead): {compensated_time:.6f}s")
 
         # Calculate bandwidths
-        size_bytes = 512 * 1024 * 1024
+        size_bytes = 512 << 20
         total_bytes = 2 * size_bytes  # write + read
         total_mb = total_bytes / 1e6
 
         # Raw bandwidth
         bandwidth_raw_gbps = (total_bytes * 8) / avg_512mb_time / 1e9
         bandwidth_raw_mbps = total_bytes / avg_512mb_time / 1e6
+        bandwidth_raw_mibps = total_bytes / avg_512mb_time / (1 << 20)
 
         # Compensated bandwidth
         bandwidth_comp_gbps = (total_bytes * 8) / compensated_time / 1e9
         bandwidth_comp_mbps = total_bytes / compensated_time / 1e6
+        bandwidth_comp_mibps = total_bytes / compensated_time / (1 << 20)
 
         print("\n" + "=" * 70)
         print("BANDWIDTH RESULTS")
         print("=" * 70)
         print(f"\nData transferred per test: {total_mb:.1f} MB (512MB write + 512MB read)")
         print(f"\nRaw measurements (includes overhead):")
-        print(f"  Bandwidth: {bandwidth_raw_gbps:.2f} Gb/s ({bandwidth_raw_mbps:.1f} MB/s)")
+        print(f"  Bandwidth: {bandwidth_raw_gbps:.2f} Gb/s ({bandwidth_raw_mbps:.1f} MB/s, {bandwidth_raw_mibps:.1f} MiB/s)")
         print(f"  Test time: {avg_512mb_time:.6f}s")
 
         print(f"\nCompensated measurements (overhead removed):")
-        print(f"  Bandwidth: {bandwidth_comp_gbps:.2f} Gb/s ({bandwidth_comp_mbps:.1f} MB/s)")
+        print(f"  Bandwidth: {bandwidth_comp_gbps:.2f} Gb/s ({bandwidth_comp_mbps:.1f} MB/s, {bandwidth_comp_mibps:.1f} MiB/s)")
         print(f"  Test time: {compensated_time:.6f}s")
 
         print("\n" + "=" * 70)
@@ -193,13 +232,11 @@ def main():
 
     except Exception as e:
         print(f"\nException: {e}")
-        import traceback
         traceback.print_exc()
         return 1
 
     finally:
         usb.memtest_stop()
-        usb.close()
 
 if __name__ == '__main__':
     sys.exit(main())
@@ -19,15 +19,13 @@ txdata = bytes([CMD_GET_VERSION])
 print(f"TX: {txdata.hex()}")
 usb.send(txdata)
 
-import time
-time.sleep(0.1)
-
+# recv blocks until the response arrives, no need to sleep first
 print("Receiving 4-byte version...")
 rxdata = usb.recv(4)
 print(f"RX: {rxdata.hex()} ({len(rxdata)} bytes)")
 
 if len(rxdata) == 4:
-    version = rxdata[0] | (rxdata[1] << 8) | (rxdata[2] << 16) | (rxdata[3] << 24)
+    version = int.from_bytes(rxdata, 'little')
     print(f"\n✓ Firmware Version: 0x{version:08X}")
 
     if version == 0x20250120:
@@ -39,12 +39,22 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from USB_FTX232H_FT60X import USB_FTX232H_FT60X_sync245mode
+import atexit
+import ctypes
+import struct
 import time
 
 # USB Command codes
 CMD_TX_MASS   = 0x01
 CMD_REG_WRITE = 0x02
 CMD_REG_READ  = 0x03
+CMD_GET_STATUS = 0x05
+
+# Precompiled command layouts: REG_WRITE [CMD][ADDR(4B,LE)][DATA(4B,LE)],
+# REG_READ [CMD][ADDR(4B,LE)], GET_STATUS [CMD]
+_WR = struct.Struct('<BII')
+_RD = struct.Struct('<BI')
+_GET_STATUS = bytes([CMD_GET_STATUS])
 
 # Register map (from axi_lite_slave.v)
 # These are byte addresses that map to slaveReg[] array
@@ -68,6 +78,11 @@ REG_15_TESTER_STAT = 0x3C  # slaveReg[15] - [RO] bit0=tester_loop_done, bit1=tes
 REG_16_TESTER_RST  = 0x40  # slaveReg[16] - [WO] bit0=tester_rst
 REG_17_TESTER_PAT  = 0x44  # slaveReg[17] - [WO] tester_pattern[31:0]
 
+# Plain configuration registers: they only hold what the host last wrote,
+# so USBDDRControl skips a write when the register already has that value
+CACHED_REGS = frozenset((REG_4_DATA_L, REG_5_DATA_H, REG_6_LFSR, REG_7_X16,
+                         REG_8_ARLEN, REG_9_SIZE, REG_17_TESTER_PAT))
+
 # DDR Controller register bases (from jtag_drv.py, accessed via AXI0 not via axi_lite_slave)
 # NOTE: These registers are NOT accessed through axi_lite_slave!
 # They connect directly to AXI0 bus which goes to the DDR controller
@@ -77,6 +92,32 @@ DDR_PI_BASE   = 0x2080  # PI registers (PI type) at DDR addr 0x2000
 DDR_PHY_BASE  = 0x4080  # PHY registers (PHY type) at DDR addr 0x4000
 
 
+
+class StatusReg(ctypes.LittleEndianStructure):
+    """REG_1_STATUS bit layout"""
+    _fields_ = [
+        ('memtest_done', ctypes.c_uint32, 1),
+        ('memtest_fail', ctypes.c_uint32, 1),
+    ]
+
+    @classmethod
+    def from_value(cls, value):
+        return cls.from_buffer_copy((value & 0xFFFFFFFF).to_bytes(4, 'little'))
+
+
+class ConfigReg(ctypes.LittleEndianStructure):
+    """REG_10_CONFIG bit layout"""
+    _fields_ = [
+        ('cfg_rst', ctypes.c_uint32, 1),
+        ('cfg_sel', ctypes.c_uint32, 1),
+        ('cfg_start', ctypes.c_uint32, 1),
+        ('cfg_done', ctypes.c_uint32, 1),
+    ]
+
+    @classmethod
+    def from_value(cls, value):
+        return cls.from_buffer_copy((value & 0xFFFFFFFF).to_bytes(4, 'little'))
+
 class USBDDRControl:
     """USB3 interface for DDR control and testing"""
 
@@ -84,11 +125,51 @@ class USBDDRControl:
                                      ('FT60X', 'FTDI SuperSpeed-FIFO Bridge'))):
         """Initialize USB connection"""
         self.usb = USB_FTX232H_FT60X_sync245mode(device_to_open_list=device_list)
+        self._reg_cache = {}  # CACHED_REGS address -> last known value
         print("USB3 DDR Control initialized")
 
+    _shared = None
+
+    # Largest single USB send used by reg_write_bulk, a whole number of
+    # 9-byte REG_WRITE commands, big enough to run the FT601 near its
+    # bulk-transfer ceiling. This is far more than the 256-byte ftdi_245fifo
+    # RX FIFO (RX_EA=8) holds; it is safe because the FT601 only hands bytes
+    # to the FPGA as that FIFO drains, so flow control is FT601 backpressure.
+    tx_watermark = 8190
+
+    @classmethod
+    def shared(cls):
+        """
+        Return a process-wide instance, opening the device on first use
+
+        Test scripts run back to back from one interpreter reuse the open
+        FT60X handle instead of re-enumerating the device for each script.
+        The handle is closed at interpreter exit.
+
+        Returns:
+            usb: Shared USBDDRControl instance
+        """
+        if cls._shared is None:
+            cls._shared = cls()
+            atexit.register(cls._shared.close)
+        return cls._shared
+
+    def set_watermark(self, nbytes):
+        """
+        Set the largest USB send used for bulk register writes
+
+        Args:
+            nbytes: Transfer size in bytes, rounded down to whole commands
+        """
+        self.tx_watermark = max(9, nbytes - nbytes % 9)
+
     def close(self):
-        """Close USB connection"""
-        self.usb.close()
+        """Close USB connection (safe to call more than once)"""
+        if self.usb is not None:
+            self.usb.close()
+            self.usb = None
+        if USBDDRControl._shared is self:
+            USBDDRControl._shared = None
 
     def reg_write(self, addr, data):
         """
@@ -98,14 +179,56 @@ class USBDDRControl:
             addr: Register address (32-bit)
             data: Data to write (32-bit)
         """
+        if addr in CACHED_REGS and self._reg_cache.get(addr) == data:
+            return  # Register already holds this value
+
         # Protocol: [CMD][ADDR(4B,LE)][DATA(4B,LE)]
-        txdata = bytes([
-            CMD_REG_WRITE,
-            addr & 0xFF, (addr >> 8) & 0xFF, (addr >> 16) & 0xFF, (addr >> 24) & 0xFF,
-            data & 0xFF, (data >> 8) & 0xFF, (data >> 16) & 0xFF, (data >> 24) & 0xFF
-        ])
+        txdata = _WR.pack(CMD_REG_WRITE, addr & 0xFFFFFFFF, data & 0xFFFFFFFF)
         self.usb.send(txdata)
         # No response expected for write
+        self._reg_cache_update(((addr, data),))
+
+    def reg_write_bulk(self, pairs):
+        """
+        Write several AXI-Lite registers in a single USB transfer
+
+        The command handler returns to RX_CMD after each write, so the
+        REG_WRITE commands are concatenated and sent in one go.
+
+        Args:
+            pairs: Sequence of (addr, data) tuples, written in order.
+                   Long sequences go out in tx_watermark-sized sends.
+        """
+        # Filter in order against a working copy of the cache, so a write
+        # that follows a REG_3_RESET in the same batch is never dropped
+        cache = dict(self._reg_cache)
+        kept = []
+        for addr, data in pairs:
+            if addr in CACHED_REGS:
+                if cache.get(addr) == data:
+                    continue  # Register already holds this value
+                cache[addr] = data
+            elif addr == REG_3_RESET:
+                cache.clear()  # Resets may clear the register file
+            kept.append((addr, data))
+        pairs = kept
+        # Pack every command into one preallocated buffer
+        buf = bytearray(9 * len(pairs))
+        for i, (addr, data) in enumerate(pairs):
+            _WR.pack_into(buf, 9 * i, CMD_REG_WRITE, addr & 0xFFFFFFFF, data & 0xFFFFFFFF)
+        txdata = bytes(buf)
+        for start in range(0, len(txdata), self.tx_watermark):
+            self.usb.send(txdata[start:start + self.tx_watermark])
+        # No response expected for write
+        self._reg_cache = cache
+
+    def _reg_cache_update(self, pairs):
+        """Record register writes that have gone out to the FPGA"""
+        for addr, data in pairs:
+            if addr in CACHED_REGS:
+                self._reg_cache[addr] = data
+            elif addr == REG_3_RESET:
+                self._reg_cache.clear()  # Resets may clear the register file
 
     def reg_read(self, addr, timeout=2.0, verbose=False):
         """
@@ -120,10 +243,7 @@ class USBDDRControl:
             data: 32-bit value read from register
         """
         # Protocol: [CMD][ADDR(4B,LE)]
-        txdata = bytes([
-            CMD_REG_READ,
-            addr & 0xFF, (addr >> 8) & 0xFF, (addr >> 16) & 0xFF, (addr >> 24) & 0xFF
-        ])
+        txdata = _RD.pack(CMD_REG_READ, addr & 0xFFFFFFFF)
 
         if verbose:
             print(f"  Sending read command: {txdata.hex()}")
@@ -134,14 +254,13 @@ class USBDDRControl:
         if verbose:
             print(f"  Waiting for 4 bytes response (timeout={timeout}s)...")
 
-        start_time = time.time()
+        deadline = time.monotonic() + timeout
         rxdata = bytes()
 
         while len(rxdata) < 4:
             # Check timeout on every iteration, not just when rxdata is empty
-            elapsed = time.time() - start_time
-            if elapsed > timeout:
-                raise TimeoutError(f"Register read timeout after {elapsed:.2f}s (addr=0x{addr:04X}, received {len(rxdata)}/4 bytes)")
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Register read timeout after {timeout:.2f}s (addr=0x{addr:04X}, received {len(rxdata)}/4 bytes)")
 
             chunk = self.usb.recv(4 - len(rxdata))
             rxdata += chunk
@@ -156,7 +275,101 @@ class USBDDRControl:
             raise Exception(f"Expected 4 bytes, got {len(rxdata)}")
 
         # Convert little-endian bytes to 32-bit value
-        value = rxdata[0] | (rxdata[1] << 8) | (rxdata[2] << 16) | (rxdata[3] << 24)
+        value = int.from_bytes(rxdata, 'little')
+        if addr in CACHED_REGS:
+            self._reg_cache[addr] = value
+        return value
+
+    def reg_read_bulk(self, addrs, timeout=2.0):
+        """
+        Read several AXI-Lite registers in a single USB transfer
+
+        The command handler returns to RX_CMD after each read response,
+        so the REG_READ commands are concatenated into one send and the
+        4-byte responses come back together in request order.
+
+        Args:
+            addrs: Sequence of register addresses
+            timeout: Timeout in seconds (default 2.0)
+
+        Returns:
+            values: List of 32-bit values, one per address
+        """
+        addrs = list(addrs)
+        if not addrs:
+            return []
+
+        txdata = b''.join(_RD.pack(CMD_REG_READ, addr & 0xFFFFFFFF) for addr in addrs)
+        self.usb.send(txdata)
+
+        expected = 4 * len(addrs)
+        deadline = time.monotonic() + timeout
+        rxdata = bytes()
+
+        while len(rxdata) < expected:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Bulk register read timeout after {timeout:.2f}s (received {len(rxdata)}/{expected} bytes)")
+
+            chunk = self.usb.recv(expected - len(rxdata))
+            rxdata += chunk
+
+            if len(chunk) == 0:
+                time.sleep(0.001)  # Short delay before retry
+
+        # Convert each little-endian 4-byte word to a 32-bit value
+        return [int.from_bytes(rxdata[i:i+4], 'little') for i in range(0, expected, 4)]
+
+    def reg_read_block(self, addr, n_words, timeout=2.0):
+        """
+        Read n_words consecutive 32-bit registers starting at addr
+
+        Args:
+            addr: Address of the first register
+            n_words: Number of registers to read
+            timeout: Timeout in seconds (default 2.0)
+
+        Returns:
+            values: List of 32-bit values, lowest address first
+        """
+        return self.reg_read_bulk(range(addr, addr + 4*n_words, 4), timeout)
+
+    def reg_write_and_readback(self, addr, data, timeout=2.0):
+        """
+        Write an AXI-Lite register and read it back in a single USB transfer
+
+        The REG_WRITE and REG_READ commands are sent together; the command
+        handler executes them back to back, so nothing else on the host
+        side can slip in between the write and the readback.
+
+        Args:
+            addr: Register address (32-bit)
+            data: Data to write (32-bit)
+            timeout: Timeout in seconds (default 2.0)
+
+        Returns:
+            value: 32-bit value read back from the register
+        """
+        txdata = (_WR.pack(CMD_REG_WRITE, addr & 0xFFFFFFFF, data & 0xFFFFFFFF) +
+                  _RD.pack(CMD_REG_READ, addr & 0xFFFFFFFF))
+        self.usb.send(txdata)
+
+        # Write has no response, so only the 4-byte read response comes back
+        deadline = time.monotonic() + timeout
+        rxdata = bytes()
+
+        while len(rxdata) < 4:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Register readback timeout after {timeout:.2f}s (addr=0x{addr:04X}, received {len(rxdata)}/4 bytes)")
+
+            chunk = self.usb.recv(4 - len(rxdata))
+            rxdata += chunk
+
+            if len(chunk) == 0:
+                time.sleep(0.001)  # Short delay before retry
+
+        value = int.from_bytes(rxdata, 'little')
+        if addr in CACHED_REGS:
+            self._reg_cache[addr] = value
         return value
 
     def get_status(self):
@@ -170,25 +383,24 @@ class USBDDRControl:
                 bit[2] = axi_rvalid
         """
         # Send GET_STATUS command
-        self.usb.send(bytes([0x05]))
+        self.usb.send(_GET_STATUS)
 
         # Read 4-byte response
         rxdata = bytes()
-        start_time = time.time()
-        timeout = 2.0
+        deadline = time.monotonic() + 2.0
 
         while len(rxdata) < 4:
             chunk = self.usb.recv(4 - len(rxdata))
             rxdata += chunk
 
-            if len(rxdata) == 0 and (time.time() - start_time) > timeout:
+            if len(rxdata) == 0 and time.monotonic() > deadline:
                 raise TimeoutError("No response from GET_STATUS")
 
             if len(chunk) == 0:
                 time.sleep(0.001)
 
         # Convert to 32-bit value
-        value = rxdata[0] | (rxdata[1] << 8) | (rxdata[2] << 16) | (rxdata[3] << 24)
+        value = int.from_bytes(rxdata, 'little')
         return value
 
     # ========================================================================
@@ -256,6 +468,7 @@ class USBDDRControl:
     def config_restart(self):
         """
         Reset DDR configuration (from jtag_drv.py config_restart)
+        This is required before accessing DDR controller registers!
 
         REG_3_RESET bits:
         bit[0] = phy_rstn
@@ -284,13 +497,10 @@ class USBDDRControl:
         bit[2] = config_start
         bit[3] = config_done (read-only)
         """
-        # Assert config_rst with selected config_sel
-        output = (0 << 2) | ((sel & 0x1) << 1) | (1 << 0)
-        self.reg_write(REG_10_CONFIG, output)
-
-        # Deassert config_rst
-        output = (0 << 2) | ((sel & 0x1) << 1) | (0 << 0)
-        self.reg_write(REG_10_CONFIG, output)
+        # Assert then deassert config_rst with selected config_sel,
+        # in one USB transfer
+        self.reg_write_bulk(((REG_10_CONFIG, (0 << 2) | ((sel & 0x1) << 1) | (1 << 0)),
+                             (REG_10_CONFIG, (0 << 2) | ((sel & 0x1) << 1) | (0 << 0))))
 
     def read_ctl_id(self):
         """
@@ -316,8 +526,7 @@ class USBDDRControl:
         """Set 64-bit test data pattern"""
         data_l = data & 0xFFFFFFFF
         data_h = (data >> 32) & 0xFFFFFFFF
-        self.reg_write(REG_4_DATA_L, data_l)
-        self.reg_write(REG_5_DATA_H, data_h)
+        self.reg_write_bulk(((REG_4_DATA_L, data_l), (REG_5_DATA_H, data_h)))
 
     def memtest_size(self, size_mb):
         """
@@ -336,14 +545,11 @@ class USBDDRControl:
         Args:
             lfsr_en: Enable LFSR mode (True) or use fixed pattern (False)
         """
-        # Set LFSR enable
-        self.reg_write(REG_6_LFSR, 1 if lfsr_en else 0)
-
-        # Clear start/rstn
-        self.reg_write(REG_2_CONTROL, 0x00)
-
-        # Set start and rstn
-        self.reg_write(REG_2_CONTROL, 0x03)
+        # One USB transfer: set LFSR enable, clear start/rstn, then set
+        # start and rstn
+        self.reg_write_bulk(((REG_6_LFSR, 1 if lfsr_en else 0),
+                             (REG_2_CONTROL, 0x00),
+                             (REG_2_CONTROL, 0x03)))
 
     def memtest_stop(self):
         """
@@ -354,34 +560,62 @@ class USBDDRControl:
         """
         self.reg_write(REG_2_CONTROL, 0x00)
 
-    def memtest_poll_done(self, timeout=30.0):
+    def poll_until(self, addr, mask, expected, timeout=30.0, initial_delay=0.00005):
         """
-        Poll until memory test completes
+        Poll a register until (value & mask) == expected
+
+        The firmware has no poll command, so this is done from the host.
+        The delay between reads starts at initial_delay (50us by default)
+        and backs off by 1.3x, capped at 10ms once below that, which keeps
+        status traffic low during long operations.
 
         Args:
+            addr: Register address to poll
+            mask: Bits of the register to compare
+            expected: Value the masked bits must equal
             timeout: Maximum time to wait in seconds
+            initial_delay: First sleep after a miss, e.g. a fraction of the
+                           expected duration of the operation being waited on
 
         Returns:
-            fail: True if test failed, False if passed
+            value: Last register value read (the one satisfying the condition)
 
         Raises:
-            TimeoutError: If test doesn't complete within timeout
+            TimeoutError: If the condition is not met within timeout
         """
-        start_time = time.time()
+        deadline = time.monotonic() + timeout
+        delay = initial_delay
 
         while True:
-            status = self.reg_read(REG_1_STATUS)
+            value = self.reg_read(addr)
+
+            if (value & mask) == expected:
+                return value
+
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Register 0x{addr:04X} did not reach 0x{expected:X} (mask 0x{mask:X}) within {timeout}s")
+
+            time.sleep(delay)
+            delay = min(delay * 1.3, 0.01)
 
-            # Check if done (bit 0)
-            if status & 0x01:
-                # Check if failed (bit 1)
-                return bool(status & 0x02)
+    def memtest_poll_done(self, timeout=30.0):
+        """
+        Poll until memory test completes
+
+        Args:
+            timeout: Maximum time to wait in seconds
+
+        Returns:
+            fail: True if test failed, False if passed
 
-            # Check timeout
-            if time.time() - start_time > timeout:
-                raise TimeoutError(f"Memory test did not complete within {timeout}s")
+        Raises:
+            TimeoutError: If test doesn't complete within timeout
+        """
+        # Wait for done (bit 0)
+        status = self.poll_until(REG_1_STATUS, 0x01, 0x01, timeout)
 
-            time.sleep(0.01)  # Poll every 10ms
+        # Check if failed (bit 1)
+        return bool(StatusReg.from_value(status).memtest_fail)
 
     def memtest_read_fail_dq(self):
         """Read which DQ bits failed"""
@@ -404,9 +638,9 @@ class USBDDRControl:
             print(f"Running {size_mb}MB memory test...")
             print(f"Pattern: {'LFSR' if lfsr_en else f'0x{pattern:016X}'}")
 
-        # Stop any running test first
+        # Stop any running test first, done (bit 0) clears once the checker is in reset
         self.memtest_stop()
-        time.sleep(0.1)
+        self.poll_until(REG_1_STATUS, 0x01, 0x00, timeout=1.0)
 
         # Configure test
         if not lfsr_en:
@@ -414,13 +648,13 @@ class USBDDRControl:
         self.memtest_size(size_mb)
 
         # Start test
-        start_time = time.time()
+        start_time = time.monotonic()
         self.memtest_restart(lfsr_en)
 
         # Wait for completion
         try:
             failed = self.memtest_poll_done()
-            elapsed = time.time() - start_time
+            elapsed = time.monotonic() - start_time
 
             if failed:
                 fail_dq = self.memtest_read_fail_dq()
@@ -483,39 +717,6 @@ class USBDDRControl:
         """Assert DDR controller resets (put all DDR components in reset)"""
         self.reg_write(0x000C, 0x00000000)
 
-    def config_restart(self):
-        """
-        Restart configuration - performs reset pulse on all DDR components
-        This is required before accessing DDR controller registers!
-
-        REG_3 bits:
-        bit[0] = phy_rstn
-        bit[1] = ctrl_rstn
-        bit[2] = reg_axi_rstn
-        bit[3] = axi0_rstn
-        bit[4] = axi1_rstn
-        """
-        # Assert all resets
-        self.reg_write(0x000C, 0x00000000)
-        time.sleep(0.1)
-
-        # Release all resets
-        self.reg_write(0x000C, 0x0000001F)
-
-    def config_ctrl_sel(self, sel):
-        """
-        Configure control selection
-
-        REG_10 bits:
-        bit[0] = config_rst
-        bit[1] = config_sel
-        bit[2] = config_start
-        bit[3] = config_done (read-only)
-        """
-        # CFG_RESET=1, CFG_SEL=sel, CFG_START=0
-        value = (0 << 2) | ((sel & 0x1) << 1) | 1
-        self.reg_write(0x0028, value)  # REG_10 at offset 0x28
-
     def ddr_auto_init(self, timeout=5.0):
         """
         Trigger DDR auto-initialization using built-in configuration
@@ -534,33 +735,30 @@ class USBDDRControl:
         # Step 1: Select built-in configuration (cfg_sel=0)
         # REG_10_CONFIG: bit0=cfg_rst, bit1=cfg_sel, bit2=cfg_start
 
-        # Assert config reset with cfg_sel=0
-        self.reg_write(REG_10_CONFIG, 0x01)  # cfg_rst=1, cfg_sel=0, cfg_start=0
-        time.sleep(0.01)
-
-        # Deassert config reset
-        self.reg_write(REG_10_CONFIG, 0x00)  # cfg_rst=0, cfg_sel=0, cfg_start=0
+        # Assert then deassert config reset with cfg_sel=0, in one USB transfer
+        self.reg_write_bulk(((REG_10_CONFIG, 0x01),   # cfg_rst=1, cfg_sel=0, cfg_start=0
+                             (REG_10_CONFIG, 0x00)))  # cfg_rst=0, cfg_sel=0, cfg_start=0
         time.sleep(0.01)
 
         # Step 2: Pulse cfg_start to trigger initialization
-        self.reg_write(REG_10_CONFIG, 0x04)  # cfg_rst=0, cfg_sel=0, cfg_start=1
-        time.sleep(0.01)
-        self.reg_write(REG_10_CONFIG, 0x00)  # cfg_rst=0, cfg_sel=0, cfg_start=0
+        self.reg_write_bulk(((REG_10_CONFIG, 0x04),   # cfg_rst=0, cfg_sel=0, cfg_start=1
+                             (REG_10_CONFIG, 0x00)))  # cfg_rst=0, cfg_sel=0, cfg_start=0
 
         # Step 3: Wait for cfg_done (bit 3 of REG_10_CONFIG)
         print("Waiting for DDR initialization to complete...")
-        start_time = time.time()
+        start_time = time.monotonic()
+        deadline = start_time + timeout
 
         while True:
             config_reg = self.reg_read(REG_10_CONFIG)
             cfg_done = (config_reg >> 3) & 0x1
 
             if cfg_done:
-                elapsed = time.time() - start_time
+                elapsed = time.monotonic() - start_time
                 print(f"✓ DDR initialization complete in {elapsed:.2f}s")
                 return True
 
-            if time.time() - start_time > timeout:
+            if time.monotonic() > deadline:
                 print(f"✗ DDR initialization timeout after {timeout}s")
                 print(f"  REG_10_CONFIG = 0x{config_reg:08X}")
                 return False
@@ -572,18 +770,15 @@ class USBDDRControl:
 def test_register_access():
     """Test basic register read/write"""
     print("\n=== Testing Register Access ===")
-    usb = USBDDRControl()
+    usb = USBDDRControl.shared()
 
     try:
         # Test register write/read using REG_17_TESTER_PAT (a general purpose register)
         test_addr = REG_17_TESTER_PAT
         test_value = 0xDEADBEEF
 
-        print(f"Writing 0x{test_value:08X} to register 0x{test_addr:04X}...")
-        usb.reg_write(test_addr, test_value)
-
-        print(f"Reading from register 0x{test_addr:04X}...")
-        read_value = usb.reg_read(test_addr, verbose=True, timeout=2.0)
+        print(f"Writing 0x{test_value:08X} to register 0x{test_addr:04X} and reading it back...")
+        read_value = usb.reg_write_and_readback(test_addr, test_value, timeout=2.0)
         print(f"Read value: 0x{read_value:08X}")
 
         if read_value == test_value:
@@ -594,20 +789,13 @@ def test_register_access():
     except Exception as e:
         print(f"✗ Test FAILED with exception: {e}")
 
-    finally:
-        usb.close()
-
 
 def test_memtest(size_mb=4):
     """Test memory with specified size"""
     print(f"\n=== Testing {size_mb}MB Memory ===")
-    usb = USBDDRControl()
+    usb = USBDDRControl.shared()
 
-    try:
-        result = usb.memtest_run(size_mb=size_mb, lfsr_en=True, verbose=True)
-        return result
-    finally:
-        usb.close()
+    return usb.memtest_run(size_mb=size_mb, lfsr_en=True, verbose=True)
 
 
 if __name__ == '__main__':
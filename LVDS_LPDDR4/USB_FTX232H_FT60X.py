@@ -294,51 +294,74 @@ class USB_FTX232H_FT60X_sync245mode():
                              if the device cannot send so many data until timeout, len(data) < recv_len
         '''
         
-        data = b''
-        
         if self.device_type == 'FT60X' :
-            chunk = bytes(self._chunk)
+            # fill one preallocated buffer in place instead of growing a
+            # bytes object chunk by chunk, which recopies everything received so far
+            buf = bytearray(recv_len)
+            rxlen = self.recv_into(buf, recv_len)
+            return bytes(memoryview(buf)[:rxlen])
+        
+        data = []
+        
+        for si in range(0, recv_len, self._chunk):
+            ei = si + self._chunk
+            ei = min(ei, recv_len)
             
-            zero_count = 0
-            si = 0
+            chunk_len = ei - si
             
-            while si < recv_len :
-                ei = si + self._chunk
-                ei = min(ei, recv_len)
-
-                #print(f"reading {ei-si} bytes")
-                rxlen_once = self._usb.readPipe(0x82, chunk, ei-si)      # try to read (ei-si) bytes
-                
-                si += rxlen_once
-                #print(rxlen_once)
-                
-                if rxlen_once > 0 :
-                    zero_count = 0
-                    data += chunk[:rxlen_once]
-                else :                                                   # no byte received
-                    zero_count += 1
-                    #print("zero",zero_count)
-                    if zero_count >= 1 :
-                        # clean up the mess and return what we had so far
-                        self._usb.abortPipe(0x82)
-                        self._usb.flushPipe(0x82)
-                        break
+            chunk = self._usb.read(chunk_len)
+            
+            data.append(chunk)
+            
+            if len(chunk) < chunk_len:
+                break
         
-        else:
-            for si in range(0, recv_len, self._chunk):
-                ei = si + self._chunk
-                ei = min(ei, recv_len)
-                
-                chunk_len = ei - si
-                
-                chunk = self._usb.read(chunk_len)
-                
-                data += chunk
-                
-                if len(chunk) < chunk_len:
-                    break
+        return b''.join(data)
+    
+    
+    
+    
+    def recv_into(self, buf, recv_len=None):
+        '''
+            recv_into(bytearray buf, int recv_len) -> int actual_recv_len
+            function:
+                receive data straight into a preallocated buffer, so large
+                repeated reads don't allocate and concatenate new bytes
+            parameter:
+                bytearray buf : writable buffer, can be reused across calls
+                int recv_len : data length to be received, default len(buf)
+            return:
+                int actual_recv_len : received byte count, the data is in buf[:actual_recv_len]
+                                      if the device cannot send so many data until timeout, actual_recv_len < recv_len
+        '''
+        
+        if recv_len is None:
+            recv_len = len(buf)
+        
+        if self.device_type != 'FT60X' :
+            data = self.recv(recv_len)
+            buf[:len(data)] = data
+            return len(data)
+        
+        si = 0
+        
+        while si < recv_len :
+            ei = si + self._chunk
+            ei = min(ei, recv_len)
+            
+            window = (ctypes.c_char * (ei-si)).from_buffer(buf, si)    # buf[si:ei] without a copy
+            rxlen_once = self._usb.readPipe(0x82, window, ei-si)
+            del window
+            
+            si += rxlen_once
+            
+            if rxlen_once <= 0 :                                         # no byte received
+                # clean up the mess and return what we had so far
+                self._usb.abortPipe(0x82)
+                self._usb.flushPipe(0x82)
+                break
         
-        return data
+        return si
         
 
 
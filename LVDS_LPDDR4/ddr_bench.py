@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+DDR bandwidth benchmark helpers shared by the bandwidth test scripts
+
+Runs the memory checker in one of its test modes, reads back the hardware
+cycle counters, and converts cycles to time and bandwidth.
+
+Test modes:
+  0 = write + read (default, with verification)
+  1 = write only
+  2 = read only (assumes data already written)
+"""
+
+import time
+
+# High-resolution monotonic clock for all host-side timing
+_now = time.perf_counter
+
+# Test mode constants
+MODE_WRITE_READ = 0
+MODE_WRITE_ONLY = 1
+MODE_READ_ONLY = 2
+
+MODE_NAMES = {
+    MODE_WRITE_READ: "Write+Read",
+    MODE_WRITE_ONLY: "Write-only",
+    MODE_READ_ONLY: "Read-only"
+}
+
+# AXI clock frequency in MHz (memory checker runs on axi0_ACLK)
+# Adjust this if your PLL configuration is different
+AXI_CLK_HZ = 200_000_000
+AXI_CLK_MHZ = AXI_CLK_HZ / 1e6
+
+# Rough DDR throughput used only to pace completion polling in run_test
+EXPECTED_BYTES_PER_SEC = 8e9
+
+def read_cycle_counts(usb):
+    """Read hardware cycle counters for write and read phases"""
+    # REG_18..REG_21 in one USB transfer
+    write_cycles_l, write_cycles_h, read_cycles_l, read_cycles_h = usb.reg_read_block(0x48, 4)
+
+    write_cycles = (write_cycles_h << 32) | write_cycles_l
+    read_cycles = (read_cycles_h << 32) | read_cycles_l
+    return write_cycles, read_cycles
+
+def cycles_to_seconds(cycles):
+    """Convert cycle count to seconds based on AXI clock frequency"""
+    return cycles / AXI_CLK_HZ
+
+def run_test(usb, size_mb, pattern_type='lfsr', test_mode=MODE_WRITE_READ, configure=True):
+    """
+    Run a single memory test and measure time
+
+    Args:
+        usb: USBDDRControl instance
+        size_mb: Size in megabytes
+        pattern_type: 'lfsr' or 'fixed'
+        test_mode: 0=write+read, 1=write-only, 2=read-only
+        configure: False to reuse the registers left by the previous run
+                   and only pulse start (repeat runs of one config)
+
+    Returns:
+        (passed, elapsed_time, write_cycles, read_cycles)
+    """
+    size_bytes = size_mb << 20
+
+    # Stop any running test, then configure, in one USB transfer. The stop
+    # goes first so the config writes never land under a running test.
+    # Repeat runs of the same config skip straight to the start pulse; the
+    # memtest registers hold their values across memtest_stop
+    setup = [(0x08, 0x00)]  # REG_2_CONTROL: clear start and memtest_rstn
+    if configure:
+        # Configure pattern, test mode and size
+        if pattern_type == 'fixed':
+            setup += [(0x10, 0xDEADBEEF),  # REG_4_DATA_L
+                      (0x14, 0xCAFEBABE),  # REG_5_DATA_H
+                      (0x18, 0)]           # REG_6_LFSR = 0
+        else:
+            setup.append((0x18, 1))        # REG_6_LFSR = 1
+
+        # Configure test mode: REG_7 bits[2:1] = test_mode, bit0 = x16_en (0)
+        setup.append((0x1C, (test_mode << 1)))
+
+        # Set size
+        setup.append((0x24, size_bytes))  # REG_9_SIZE
+
+    usb.reg_write_bulk(setup)
+    usb.poll_until(0x04, 0x1, 0x0, timeout=1.0)  # done clears once the checker is in reset
+
+    start_time = _now()
+    usb.reg_write(0x08, 0x03)  # Start test
+
+    # Wait for done (bit 0). The first status read is held off for about
+    # half the expected run time, then poll_until backs off from there
+    moved = size_bytes * (2 if test_mode == MODE_WRITE_READ else 1)
+    first_delay = max(0.00005, moved / EXPECTED_BYTES_PER_SEC * 0.5)
+    try:
+        status = usb.poll_until(0x04, 0x1, 0x1, timeout=120.0, initial_delay=first_delay)
+    except TimeoutError:
+        return False, 120.0, 0, 0
+
+    elapsed = _now() - start_time
+    fail = (status >> 1) & 0x1
+    write_cycles, read_cycles = read_cycle_counts(usb)
+
+    if fail:
+        return False, elapsed, write_cycles, read_cycles
+    else:
+        return True, elapsed, write_cycles, read_cycles
+
+def run_bandwidth_test(usb, size_mb, test_mode, num_runs=5):
+    """
+    Run multiple tests of a given mode and return statistics
+
+    Returns:
+        (results, all_passed) where results is list of (elapsed, write_cycles, read_cycles)
+    """
+    results = [None] * num_runs
+    for i in range(num_runs):
+        passed, elapsed, write_cycles, read_cycles = run_test(usb, size_mb, pattern_type='lfsr', test_mode=test_mode,
+                                                            configure=(i == 0))
+        if not passed:
+            return results[:i], False
+        results[i] = (elapsed, write_cycles, read_cycles)
+    return results, True
+
+def calc_bandwidth(size_bytes, elapsed_time):
+    """Calculate bandwidth in Gb/s, MB/s (decimal) and MiB/s (binary)"""
+    if elapsed_time <= 0:
+        return 0, 0, 0
+    gbps = (size_bytes * 8) / elapsed_time / 1e9
+    mbps = size_bytes / elapsed_time / 1e6
+    mibps = size_bytes / elapsed_time / (1 << 20)
+    return gbps, mbps, mibps
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Run several scope test scripts in one interpreter, sharing one USB handle.
+
+Usage: python runall.py [script ...]
+       Default runs the quick command tests; name scripts to pick others,
+       e.g. python runall.py test_version.py test_scope_bandwidth.py
+"""
+import runpy
+import sys
+from pathlib import Path
+
+HERE = Path(__file__).parent
+sys.path.insert(0, str(HERE))
+
+from usb_session import get_usb
+
+DEFAULT_SCRIPTS = [
+    "test_version.py",
+    "test_echo.py",
+    "test_tx_mass.py",
+    "test_scope_commands.py",
+]
+
+scripts = sys.argv[1:] or DEFAULT_SCRIPTS
+
+get_usb()  # open once up front; every script below reuses the handle
+
+results = []
+for script in scripts:
+    print("\n" + "#" * 60)
+    print(f"# {script}")
+    print("#" * 60)
+
+    path = HERE / script
+    sys.argv = [str(path)]
+    try:
+        runpy.run_path(str(path), run_name="__main__")
+        ok = True
+    except SystemExit as e:
+        ok = not e.code
+    except Exception as e:
+        print(f"\nX Exception in {script}: {e}")
+        ok = False
+    results.append((script, ok))
+
+print("\n" + "=" * 60)
+print("RUNALL SUMMARY:")
+for script, ok in results:
+    print(f"  [{'OK' if ok else 'FAIL'}] {script}")
+print("=" * 60)
+
+sys.exit(0 if all(ok for _, ok in results) else 1)
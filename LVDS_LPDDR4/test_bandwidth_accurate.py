@@ -3,7 +3,8 @@
 Accurate DDR bandwidth test - measures read, write, and combined bandwidth separately
 
 Uses hardware cycle counters for accurate timing (no Python/USB overhead).
-Also measures Python timing for comparison.
+Python timing is reported only as a check; the difference from the
+hardware time is shown per run as host overhead.
 
 Test modes:
   0 = write + read (default, with verification)
@@ -12,130 +13,35 @@ Test modes:
 """
 
 from usb_ddr_control import USBDDRControl
+from ddr_bench import (MODE_WRITE_READ, MODE_WRITE_ONLY, MODE_READ_ONLY, AXI_CLK_MHZ,
+                       cycles_to_seconds, run_test, run_bandwidth_test, calc_bandwidth)
 import time
 import sys
-
-# Test mode constants
-MODE_WRITE_READ = 0
-MODE_WRITE_ONLY = 1
-MODE_READ_ONLY = 2
-
-MODE_NAMES = {
-    MODE_WRITE_READ: "Write+Read",
-    MODE_WRITE_ONLY: "Write-only",
-    MODE_READ_ONLY: "Read-only"
-}
-
-# AXI clock frequency in MHz (memory checker runs on axi0_ACLK)
-# Adjust this if your PLL configuration is different
-AXI_CLK_MHZ = 200.0
-
-def read_cycle_counts(usb):
-    """Read hardware cycle counters for write and read phases"""
-    write_cycles_l = usb.reg_read(0x48)  # REG_18
-    write_cycles_h = usb.reg_read(0x4C)  # REG_19
-    read_cycles_l = usb.reg_read(0x50)   # REG_20
-    read_cycles_h = usb.reg_read(0x54)   # REG_21
-
-    write_cycles = (write_cycles_h << 32) | write_cycles_l
-    read_cycles = (read_cycles_h << 32) | read_cycles_l
-    return write_cycles, read_cycles
-
-def cycles_to_seconds(cycles):
-    """Convert cycle count to seconds based on AXI clock frequency"""
-    return cycles / (AXI_CLK_MHZ * 1e6)
-
-def run_test(usb, size_mb, pattern_type='lfsr', test_mode=MODE_WRITE_READ):
-    """
-    Run a single memory test and measure time
-
-    Args:
-        usb: USBDDRControl instance
-        size_mb: Size in megabytes
-        pattern_type: 'lfsr' or 'fixed'
-        test_mode: 0=write+read, 1=write-only, 2=read-only
-
-    Returns:
-        (passed, elapsed_time, write_cycles, read_cycles)
-    """
-    # Stop any running test
-    usb.memtest_stop()
-    time.sleep(0.01)
-
-    # Configure pattern
-    if pattern_type == 'fixed':
-        usb.reg_write(0x10, 0xDEADBEEF)  # REG_4_DATA_L
-        usb.reg_write(0x14, 0xCAFEBABE)  # REG_5_DATA_H
-        usb.reg_write(0x18, 0)           # REG_6_LFSR = 0
-    else:
-        usb.reg_write(0x18, 1)           # REG_6_LFSR = 1
-
-    # Configure test mode: REG_7 bits[2:1] = test_mode, bit0 = x16_en (0)
-    usb.reg_write(0x1C, (test_mode << 1))
-
-    # Set size
-    size_bytes = size_mb * 1024 * 1024
-    usb.reg_write(0x24, size_bytes)  # REG_9_SIZE
-
-    # Start test
-    usb.reg_write(0x08, 0x00)
-    time.sleep(0.005)
-
-    start_time = time.time()
-    usb.reg_write(0x08, 0x03)  # Start test
-
-    # Poll for completion with minimal overhead
-    while True:
-        status = usb.reg_read(0x04)
-        done = status & 0x1
-        fail = (status >> 1) & 0x1
-
-        if done:
-            elapsed = time.time() - start_time
-            write_cycles, read_cycles = read_cycle_counts(usb)
-
-            if fail:
-                return False, elapsed, write_cycles, read_cycles
-            else:
-                return True, elapsed, write_cycles, read_cycles
-
-        # Safety timeout
-        if time.time() - start_time > 120.0:
-            return False, 120.0, 0, 0
-
-        time.sleep(0.0001)  # 100us poll interval
-
-def run_bandwidth_test(usb, size_mb, test_mode, num_runs=5):
-    """
-    Run multiple tests of a given mode and return statistics
-
-    Returns:
-        (results, all_passed) where results is list of (elapsed, write_cycles, read_cycles)
-    """
-    results = []
-    for i in range(num_runs):
-        passed, elapsed, write_cycles, read_cycles = run_test(usb, size_mb, pattern_type='lfsr', test_mode=test_mode)
-        if not passed:
-            return results, False
-        results.append((elapsed, write_cycles, read_cycles))
-    return results, True
-
-def calc_bandwidth(size_bytes, elapsed_time):
-    """Calculate bandwidth in Gb/s and MB/s"""
-    if elapsed_time <= 0:
-        return 0, 0
-    gbps = (size_bytes * 8) / elapsed_time / 1e9
-    mbps = size_bytes / elapsed_time / 1e6
-    return gbps, mbps
+import traceback
+
+# Per-run report lines, filled from one dict per run
+HW_ROW_FMT = "  Run {idx}: HW: {cycles} cycles = {hw_ms:.3f}ms -> {hw_gbps:.2f} Gb/s ({hw_mbps:.1f} MB/s){note}".format
+SW_ROW_FMT = "          SW: {sw_ms:.3f}ms -> {sw_gbps:.2f} Gb/s ({sw_mbps:.1f} MB/s), host overhead {overhead_ms:.3f}ms".format
+
+def format_run(idx, cycles, cycles_text, elapsed, nbytes, note=''):
+    """Return the HW and SW report lines for one run"""
+    hw_time = cycles_to_seconds(cycles)
+    hw_gbps, hw_mbps, _ = calc_bandwidth(nbytes, hw_time)
+    sw_gbps, sw_mbps, _ = calc_bandwidth(nbytes, elapsed)
+    row = dict(idx=idx, cycles=cycles_text, note=note,
+               hw_ms=hw_time*1000, hw_gbps=hw_gbps, hw_mbps=hw_mbps,
+               sw_ms=elapsed*1000, sw_gbps=sw_gbps, sw_mbps=sw_mbps,
+               overhead_ms=(elapsed-hw_time)*1000)
+    return HW_ROW_FMT(**row) + "\n" + SW_ROW_FMT(**row)
 
 def main():
     print("=" * 70)
     print("DDR Bandwidth Test - Hardware Cycle Counter Timing")
     print("=" * 70)
 
-    usb = USBDDRControl()
+    usb = USBDDRControl.shared()
     size_mb = 1023
-    size_bytes = size_mb * 1024 * 1024
+    size_bytes = size_mb << 20
     num_runs = 3
 
     try:
@@ -147,7 +53,15 @@ def main():
 
         print("DDR initialized and ready")
         print(f"Test size: {size_mb} MB, {num_runs} runs per test")
-        print(f"AXI clock: {AXI_CLK_MHZ} MHz (adjust AXI_CLK_MHZ if needed)\n")
+        print(f"AXI clock: {AXI_CLK_MHZ} MHz (adjust AXI_CLK_MHZ if needed)")
+        print(f"Host timer: perf_counter, {time.get_clock_info('perf_counter').resolution*1e9:.0f} ns resolution\n")
+
+        # Throwaway warm-up run so the first measured run doesn't pay for
+        # cold USB buffers and first-call Python overhead
+        passed, _, _, _ = run_test(usb, 4, pattern_type='lfsr', test_mode=MODE_WRITE_READ)
+        if not passed:
+            print("FAILED - Warm-up test error")
+            return 1
 
         # ============================================================
         # Test 1: Write-only bandwidth
@@ -161,20 +75,18 @@ def main():
             print("FAILED - Write test error")
             return 1
 
-        write_cycles_list = []
-        for i, (elapsed, write_cyc, read_cyc) in enumerate(write_results):
-            hw_time = cycles_to_seconds(write_cyc)
-            hw_gbps, hw_mbps = calc_bandwidth(size_bytes, hw_time)
-            sw_gbps, sw_mbps = calc_bandwidth(size_bytes, elapsed)
-            write_cycles_list.append(write_cyc)
-            print(f"  Run {i+1}: HW: {write_cyc:,} cycles = {hw_time*1000:.3f}ms -> {hw_gbps:.2f} Gb/s ({hw_mbps:.1f} MB/s)")
-            print(f"          SW: {elapsed*1000:.3f}ms -> {sw_gbps:.2f} Gb/s ({sw_mbps:.1f} MB/s)")
+        write_cycles_list = [write_cyc for _, write_cyc, _ in write_results]
+        print("\n".join(format_run(i+1, write_cyc, f"{write_cyc:,}", elapsed, size_bytes)
+                        for i, (elapsed, write_cyc, read_cyc) in enumerate(write_results)))
 
-        avg_write_cycles = sum(write_cycles_list) / len(write_cycles_list)
+        # Cycle counts stay Python ints; sums are exact and only the final
+        # division by the run count goes to float
+        sum_write_cycles = sum(write_cycles_list)
+        avg_write_cycles = sum_write_cycles / len(write_cycles_list)
         avg_write_hw_time = cycles_to_seconds(avg_write_cycles)
-        write_gbps, write_mbps = calc_bandwidth(size_bytes, avg_write_hw_time)
+        write_gbps, write_mbps, write_mibps = calc_bandwidth(size_bytes, avg_write_hw_time)
         print(f"\n  WRITE: {avg_write_cycles:,.0f} cycles = {avg_write_hw_time*1000:.3f}ms")
-        print(f"         {write_gbps:.2f} Gb/s ({write_mbps:.1f} MB/s)")
+        print(f"         {write_gbps:.2f} Gb/s ({write_mbps:.1f} MB/s, {write_mibps:.1f} MiB/s)")
 
         # ============================================================
         # Test 2: Read-only bandwidth (data already written above)
@@ -188,20 +100,16 @@ def main():
             print("FAILED - Read test error (data verification failed)")
             return 1
 
-        read_cycles_list = []
-        for i, (elapsed, write_cyc, read_cyc) in enumerate(read_results):
-            hw_time = cycles_to_seconds(read_cyc)
-            hw_gbps, hw_mbps = calc_bandwidth(size_bytes, hw_time)
-            sw_gbps, sw_mbps = calc_bandwidth(size_bytes, elapsed)
-            read_cycles_list.append(read_cyc)
-            print(f"  Run {i+1}: HW: {read_cyc:,} cycles = {hw_time*1000:.3f}ms -> {hw_gbps:.2f} Gb/s ({hw_mbps:.1f} MB/s) - VERIFIED")
-            print(f"          SW: {elapsed*1000:.3f}ms -> {sw_gbps:.2f} Gb/s ({sw_mbps:.1f} MB/s)")
+        read_cycles_list = [read_cyc for _, _, read_cyc in read_results]
+        print("\n".join(format_run(i+1, read_cyc, f"{read_cyc:,}", elapsed, size_bytes, " - VERIFIED")
+                        for i, (elapsed, write_cyc, read_cyc) in enumerate(read_results)))
 
-        avg_read_cycles = sum(read_cycles_list) / len(read_cycles_list)
+        sum_read_cycles = sum(read_cycles_list)
+        avg_read_cycles = sum_read_cycles / len(read_cycles_list)
         avg_read_hw_time = cycles_to_seconds(avg_read_cycles)
-        read_gbps, read_mbps = calc_bandwidth(size_bytes, avg_read_hw_time)
+        read_gbps, read_mbps, read_mibps = calc_bandwidth(size_bytes, avg_read_hw_time)
         print(f"\n  READ: {avg_read_cycles:,.0f} cycles = {avg_read_hw_time*1000:.3f}ms")
-        print(f"        {read_gbps:.2f} Gb/s ({read_mbps:.1f} MB/s)")
+        print(f"        {read_gbps:.2f} Gb/s ({read_mbps:.1f} MB/s, {read_mibps:.1f} MiB/s)")
 
         # ============================================================
         # Test 3: Write+Read combined
@@ -216,27 +124,29 @@ def main():
             return 1
 
         total_bytes = 2 * size_bytes
-        combined_write_cycles = []
-        combined_read_cycles = []
-        for i, (elapsed, write_cyc, read_cyc) in enumerate(combined_results):
-            total_cycles = write_cyc + read_cyc
-            hw_time = cycles_to_seconds(total_cycles)
-            hw_gbps, hw_mbps = calc_bandwidth(total_bytes, hw_time)
-            sw_gbps, sw_mbps = calc_bandwidth(total_bytes, elapsed)
-            combined_write_cycles.append(write_cyc)
-            combined_read_cycles.append(read_cyc)
-            print(f"  Run {i+1}: HW: W={write_cyc:,} + R={read_cyc:,} = {total_cycles:,} cycles")
-            print(f"          {hw_time*1000:.3f}ms -> {hw_gbps:.2f} Gb/s ({hw_mbps:.1f} MB/s) - VERIFIED")
-            print(f"          SW: {elapsed*1000:.3f}ms -> {sw_gbps:.2f} Gb/s ({sw_mbps:.1f} MB/s)")
-
-        avg_combined_write = sum(combined_write_cycles) / len(combined_write_cycles)
-        avg_combined_read = sum(combined_read_cycles) / len(combined_read_cycles)
-        avg_combined_total = avg_combined_write + avg_combined_read
+        combined_write_cycles = [write_cyc for _, write_cyc, _ in combined_results]
+        combined_read_cycles = [read_cyc for _, _, read_cyc in combined_results]
+        print("\n".join(format_run(i+1, write_cyc + read_cyc,
+                                   f"W={write_cyc:,} + R={read_cyc:,} = {write_cyc + read_cyc:,}",
+                                   elapsed, total_bytes, " - VERIFIED")
+                        for i, (elapsed, write_cyc, read_cyc) in enumerate(combined_results)))
+
+        sum_combined_write = sum(combined_write_cycles)
+        sum_combined_read = sum(combined_read_cycles)
+        avg_combined_write = sum_combined_write / num_runs
+        avg_combined_read = sum_combined_read / num_runs
+        avg_combined_total = (sum_combined_write + sum_combined_read) / num_runs
         avg_combined_hw_time = cycles_to_seconds(avg_combined_total)
-        combined_gbps, combined_mbps = calc_bandwidth(total_bytes, avg_combined_hw_time)
+        combined_gbps, combined_mbps, combined_mibps = calc_bandwidth(total_bytes, avg_combined_hw_time)
         print(f"\n  COMBINED: W={avg_combined_write:,.0f} + R={avg_combined_read:,.0f} = {avg_combined_total:,.0f} cycles")
         print(f"            {avg_combined_hw_time*1000:.3f}ms -> {combined_gbps:.2f} Gb/s ({combined_mbps:.1f} MB/s)")
 
+        # Per-phase bandwidth inside the combined run, straight from each phase's counter
+        combined_write_gbps, combined_write_mbps, combined_write_mibps = calc_bandwidth(size_bytes, cycles_to_seconds(avg_combined_write))
+        combined_read_gbps, combined_read_mbps, combined_read_mibps = calc_bandwidth(size_bytes, cycles_to_seconds(avg_combined_read))
+        print(f"            write phase {combined_write_gbps:.2f} Gb/s ({combined_write_mbps:.1f} MB/s), "
+              f"read phase {combined_read_gbps:.2f} Gb/s ({combined_read_mbps:.1f} MB/s)")
+
         # ============================================================
         # Summary
         # ============================================================
@@ -245,24 +155,28 @@ def main():
         print("=" * 70)
         print(f"\n  Test size: {size_mb} MB")
         print(f"  AXI clock: {AXI_CLK_MHZ} MHz")
-        print(f"\n  Write bandwidth:    {write_gbps:6.2f} Gb/s  ({write_mbps:7.1f} MB/s)")
-        print(f"  Read bandwidth:     {read_gbps:6.2f} Gb/s  ({read_mbps:7.1f} MB/s)")
-        print(f"  Combined (W+R):     {combined_gbps:6.2f} Gb/s  ({combined_mbps:7.1f} MB/s)")
+        print(f"\n  Write bandwidth:    {write_gbps:6.2f} Gb/s  ({write_mbps:7.1f} MB/s, {write_mibps:7.1f} MiB/s)")
+        print(f"  Read bandwidth:     {read_gbps:6.2f} Gb/s  ({read_mbps:7.1f} MB/s, {read_mibps:7.1f} MiB/s)")
+        print(f"  Combined (W+R):     {combined_gbps:6.2f} Gb/s  ({combined_mbps:7.1f} MB/s, {combined_mibps:7.1f} MiB/s)")
+        print(f"    write phase:      {combined_write_gbps:6.2f} Gb/s  ({combined_write_mbps:7.1f} MB/s, {combined_write_mibps:7.1f} MiB/s)")
+        print(f"    read phase:       {combined_read_gbps:6.2f} Gb/s  ({combined_read_mbps:7.1f} MB/s, {combined_read_mibps:7.1f} MiB/s)")
 
         # Calculate expected combined from individual
-        expected_cycles = avg_write_cycles + avg_read_cycles
+        expected_cycles = (sum_write_cycles + sum_read_cycles) / num_runs
         expected_time = cycles_to_seconds(expected_cycles)
-        expected_gbps, expected_mbps = calc_bandwidth(total_bytes, expected_time)
+        expected_gbps, expected_mbps, expected_mibps = calc_bandwidth(total_bytes, expected_time)
         print(f"\n  Expected combined (sum of individual):")
-        print(f"                      {expected_gbps:6.2f} Gb/s  ({expected_mbps:7.1f} MB/s)")
+        print(f"                      {expected_gbps:6.2f} Gb/s  ({expected_mbps:7.1f} MB/s, {expected_mibps:7.1f} MiB/s)")
 
-        turnaround_cycles = avg_combined_total - expected_cycles
+        turnaround_cycles = (sum_combined_write + sum_combined_read - sum_write_cycles - sum_read_cycles) / num_runs
         turnaround_time = cycles_to_seconds(turnaround_cycles)
         if avg_combined_total > 0:
             turnaround_pct = turnaround_cycles / avg_combined_total * 100
         else:
             turnaround_pct = 0
         print(f"\n  Write/Read turnaround: {turnaround_cycles:,.0f} cycles = {turnaround_time*1000:.3f}ms ({turnaround_pct:.1f}%)")
+        print(f"    write phase {(sum_combined_write - sum_write_cycles) / num_runs:+,.0f} cycles, "
+              f"read phase {(sum_combined_read - sum_read_cycles) / num_runs:+,.0f} cycles vs. standalone")
 
         print("\n" + "=" * 70)
         print("DATA INTEGRITY: All read tests PASSED with 100% verification")
@@ -273,13 +187,11 @@ def main():
 
     except Exception as e:
         print(f"\nException: {e}")
-        import traceback
         traceback.print_exc()
         return 1
 
     finally:
         usb.memtest_stop()
-        usb.close()
 
 if __name__ == '__main__':
     sys.exit(main())
@@ -10,89 +10,74 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from USB_FTX232H_FT60X import USB_FTX232H_FT60X_sync245mode
-import time
+from usb_session import get_usb
+import struct
 
 # New command code (consolidated into command_processor)
 CMD_ECHO = 0x25  # Was 0xFE 0x06
 
-print("Opening USB device...")
-usb = USB_FTX232H_FT60X_sync245mode(device_to_open_list=(
-    ('FT60X', 'Haasoscope USB3'),
-    ('FT60X', 'FTDI SuperSpeed-FIFO Bridge')))
+usb = get_usb()
 
-def test_echo(data_bytes, description=""):
-    """Send echo command and verify response matches."""
-    length = len(data_bytes)
-    print(f"\n=== Echo Test: {description} ({length} bytes) ===")
+def submit_echo(data_bytes):
+    """Build the echo command for data_bytes; returns the bytes to send."""
+    expected = bytes(data_bytes)
+    length = len(expected)
 
     # Build 8-byte command: cmd + length (2 bytes LE) + first 5 data bytes
     # rx_data[0]=cmd, rx_data[1:2]=length, rx_data[3:7]=first 5 data bytes
-    cmd_data = [CMD_ECHO, length & 0xFF, (length >> 8) & 0xFF]
-    # Add first 5 bytes of data (or pad with 0s)
-    for i in range(5):
-        if i < len(data_bytes):
-            cmd_data.append(data_bytes[i])
-        else:
-            cmd_data.append(0)
-    txdata = bytes(cmd_data)
-    print(f"TX: {txdata.hex()} ({len(txdata)} bytes)")
-    usb.send(txdata)
+    # (struct's 5s field zero-pads data shorter than 5 bytes)
+    txdata = struct.pack('<BH5s', CMD_ECHO, length, expected[:5])
 
-    # If more than 5 bytes, send remaining data
+    # If more than 5 bytes, the remaining data follows the command
     if length > 5:
-        extra_data = bytes(data_bytes[5:])
-        print(f"TX extra: {extra_data.hex()} ({len(extra_data)} bytes)")
-        usb.send(extra_data)
+        txdata += expected[5:]
 
-    time.sleep(0.1)
+    return txdata
 
-    # Receive echoed data with timeout wrapper
-    rxdata = usb.recv(length)
+def verify_echo(data_bytes, rxdata, description=""):
+    """Check one echo response against the data that was sent."""
+    expected = bytes(data_bytes)
+    length = len(expected)
+    print(f"\n=== Echo Test: {description} ({length} bytes) ===")
     print(f"RX: {rxdata.hex()} ({len(rxdata)} bytes)")
 
     if len(rxdata) != length:
         print(f"FAILED - Expected {length} bytes, got {len(rxdata)}")
         return False
 
-    if rxdata == bytes(data_bytes):
+    if rxdata == expected:
         print("PASS - Echo matches!")
         return True
     else:
         print("FAILED - Data mismatch!")
-        print(f"  Expected: {bytes(data_bytes).hex()}")
+        print(f"  Expected: {expected.hex()}")
         print(f"  Got:      {rxdata.hex()}")
-        # Show byte-by-byte comparison
-        for i in range(min(len(data_bytes), len(rxdata))):
-            if data_bytes[i] != rxdata[i]:
-                print(f"  Byte {i}: expected 0x{data_bytes[i]:02X}, got 0x{rxdata[i]:02X}")
+        # Show only the bytes that differ
+        diffs = [(i, exp, got) for i, (exp, got) in enumerate(zip(expected, rxdata)) if exp != got]
+        for i, exp, got in diffs:
+            print(f"  Byte {i}: expected 0x{exp:02X}, got 0x{got:02X}")
         return False
 
-# Run tests
-results = []
-
-# Test 1: Single byte
-results.append(test_echo([0x42], "single byte"))
-
-# Test 2: Two bytes
-results.append(test_echo([0x12, 0x34], "two bytes"))
-
-# Test 3: Four bytes
-results.append(test_echo([0x11, 0x22, 0x33, 0x44], "four bytes"))
-
-# Test 4: Eight bytes (common packet size)
-results.append(test_echo([0x01, 0x02, 0x03, 0x04, 0x05, 0x06, 0x07, 0x08], "eight bytes"))
-
-# Test 5: Ascending pattern
-results.append(test_echo(list(range(16)), "16 bytes ascending"))
-
-# Test 6: All same value
-results.append(test_echo([0xAA] * 8, "8 bytes all 0xAA"))
-
-# Test 7: Alternating pattern
-results.append(test_echo([0x55, 0xAA] * 4, "alternating 0x55/0xAA"))
-
-usb.close()
+# Echo test vectors: (data bytes, description)
+TESTS = [
+    ([0x42], "single byte"),
+    ([0x12, 0x34], "two bytes"),
+    ([0x11, 0x22, 0x33, 0x44], "four bytes"),
+    ([0x01, 0x02, 0x03, 0x04, 0x05, 0x06, 0x07, 0x08], "eight bytes"),  # common packet size
+    (list(range(16)), "16 bytes ascending"),
+    ([0xAA] * 8, "8 bytes all 0xAA"),
+    ([0x55, 0xAA] * 4, "alternating 0x55/0xAA"),
+]
+
+# Run tests: the command processor handles back-to-back echo commands in
+# order, so every command goes out in one send and the echoes are read
+# back one after another. recv blocks until each echo has arrived.
+txdata = b"".join(submit_echo(data_bytes) for data_bytes, _ in TESTS)
+print(f"TX: {len(TESTS)} echo commands, {len(txdata)} bytes in one transfer")
+usb.send(txdata)
+
+results = [verify_echo(data_bytes, usb.recv(len(data_bytes)), description)
+           for data_bytes, description in TESTS]
 
 # Summary
 print("\n" + "="*50)
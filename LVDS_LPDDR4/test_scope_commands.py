@@ -8,13 +8,42 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from USB_FTX232H_FT60X import USB_FTX232H_FT60X_sync245mode
+from usb_session import get_usb, recv_batch
+import os
+import struct
 import time
 
-print("Opening USB device...")
-usb = USB_FTX232H_FT60X_sync245mode(device_to_open_list=(
-    ('FT60X', 'Haasoscope USB3'),
-    ('FT60X', 'FTDI SuperSpeed-FIFO Bridge')))
+# VERBOSE=1 dumps every response in hex; otherwise only its length is shown
+VERBOSE = os.environ.get('VERBOSE', '0') == '1'
+
+usb = get_usb()
+
+_U32 = struct.Struct('<I')
+
+# Lock/clock info fields: (name, shift, mask)
+LOCK_INFO_SPEC = [('clkswitch', 0, 0x1), ('lockinfo', 8, 0xF), ('lvdsin_spare', 16, 0x1)]
+
+
+def parse_bits(raw, spec):
+    """Unpack a 4-byte little-endian response into {name: field} per spec."""
+    value, = _U32.unpack(raw)
+    return {name: (value >> shift) & mask for name, shift, mask in spec}
+
+
+def print_rx(rxdata):
+    """Report a response, hex-dumping it only in verbose mode."""
+    if len(rxdata) == 0:
+        print("RX: No response (timeout)")
+    elif VERBOSE:
+        print(f"RX: {rxdata.hex()} ({len(rxdata)} bytes)")
+    else:
+        print(f"RX: {len(rxdata)} bytes")
+
+
+def pad_command(cmd_bytes):
+    """Pad (or truncate) a command to the 8 bytes command_processor expects."""
+    return bytes(cmd_bytes).ljust(8, b'\x00')[:8]
+
 
 def send_scope_command(cmd_bytes, description="", expected_response_len=4):
     """
@@ -28,43 +57,33 @@ def send_scope_command(cmd_bytes, description="", expected_response_len=4):
     Returns:
         bytes: Response data, or None on failure
     """
-    # Pad to 8 bytes
-    cmd = list(cmd_bytes) + [0] * (8 - len(cmd_bytes))
-    cmd = cmd[:8]  # Ensure exactly 8 bytes
+    cmd = pad_command(cmd_bytes)
 
     print(f"\n=== {description} ===")
-    print(f"TX: {bytes(cmd).hex()} (8 bytes)")
+    print(f"TX: {cmd.hex()} (8 bytes)")
 
-    usb.send(bytes(cmd))
-    time.sleep(0.1)
+    usb.send(cmd)
 
+    # recv blocks until the response arrives, no need to sleep first
     rxdata = usb.recv(expected_response_len)
 
-    if len(rxdata) > 0:
-        print(f"RX: {rxdata.hex()} ({len(rxdata)} bytes)")
-        return rxdata
-    else:
-        print("RX: No response (timeout)")
-        return None
+    print_rx(rxdata)
+    return rxdata if len(rxdata) > 0 else None
 
 
-def test_get_version():
+def test_get_version(rxdata):
     """Command 2, subcommand 0: Get firmware version."""
     # rx_data[0]=2, rx_data[1]=0 -> returns version
-    rxdata = send_scope_command([2, 0], "Get command_processor version", 4)
-
     if rxdata and len(rxdata) == 4:
-        version = rxdata[0] | (rxdata[1] << 8) | (rxdata[2] << 16) | (rxdata[3] << 24)
+        version = int.from_bytes(rxdata, 'little')
         print(f"  Version: {version}")
         return True
     return False
 
 
-def test_get_boardin():
+def test_get_boardin(rxdata):
     """Command 2, subcommand 1: Get board input status."""
     # rx_data[0]=2, rx_data[1]=1 -> returns boardin_sync
-    rxdata = send_scope_command([2, 1], "Get board input status", 4)
-
     if rxdata and len(rxdata) == 4:
         boardin = rxdata[0]
         print(f"  Board input byte: 0x{boardin:02X}")
@@ -72,95 +91,131 @@ def test_get_boardin():
     return False
 
 
-def test_get_event_counter():
+def test_get_event_counter(rxdata):
     """Command 2, subcommand 3: Get event counter."""
     # rx_data[0]=2, rx_data[1]=3 -> returns eventcounter_sync
-    rxdata = send_scope_command([2, 3], "Get event counter", 4)
-
     if rxdata and len(rxdata) == 4:
-        count = rxdata[0] | (rxdata[1] << 8) | (rxdata[2] << 16) | (rxdata[3] << 24)
+        count = int.from_bytes(rxdata, 'little')
         print(f"  Event counter: {count}")
         return True
     return False
 
 
-def test_get_lock_info():
+def test_get_lock_info(rxdata):
     """Command 2, subcommand 5: Get lock/clock info."""
     # rx_data[0]=2, rx_data[1]=5 -> returns lock info
-    rxdata = send_scope_command([2, 5], "Get lock/clock info", 4)
-
     if rxdata and len(rxdata) == 4:
-        value = rxdata[0] | (rxdata[1] << 8) | (rxdata[2] << 16) | (rxdata[3] << 24)
-        clkswitch = (value >> 0) & 1
-        lockinfo = (value >> 8) & 0xF
-        lvdsin_spare = (value >> 16) & 1
-        print(f"  Raw: 0x{value:08X}")
-        print(f"  clkswitch: {clkswitch}, lockinfo: 0x{lockinfo:X}, lvdsin_spare: {lvdsin_spare}")
+        fields = parse_bits(rxdata, LOCK_INFO_SPEC)
+        print(f"  Raw: 0x{int.from_bytes(rxdata, 'little'):08X}")
+        print(f"  clkswitch: {fields['clkswitch']}, lockinfo: 0x{fields['lockinfo']:X}, "
+              f"lvdsin_spare: {fields['lvdsin_spare']}")
         return True
     return False
 
 
-def test_trigger_arm():
+def test_trigger_arm(rxdata):
     """Command 1: Arm trigger and get acquisition state."""
     # rx_data[0]=1, rx_data[1]=triggertype, rx_data[2]=channeltype
     # rx_data[4:5]=lengthtotake
     # Returns: acqstate in low byte, sample_triggered in upper bits
-    rxdata = send_scope_command([1, 0, 0, 0, 0x10, 0x00, 0, 0],
-                                 "Arm trigger (type=0, len=16)", 4)
-
     if rxdata and len(rxdata) == 4:
         acqstate = rxdata[0]
-        sample_triggered = ((rxdata[3] << 16) | (rxdata[2] << 8) | rxdata[1]) >> 4
+        sample_triggered = int.from_bytes(rxdata[1:4], 'little') >> 4
         print(f"  Acq state: {acqstate}")
         print(f"  Sample triggered: {sample_triggered}")
         return True
     return False
 
 
-def test_read_ram_data():
+def test_read_ram_data(rxdata):
     """Command 0: Read data from RAM buffer."""
-    # First arm trigger to have some data
-    send_scope_command([1, 0, 0, 0, 0x10, 0x00, 0, 0], "Arm trigger first", 4)
-    time.sleep(0.1)
-
-    # Command 0: read RAM data
-    # rx_data[4:7] = length (32-bit LE)
-    # Let's read 16 bytes (4 words)
-    length = 16
-    rxdata = send_scope_command(
-        [0, 0, 0, 0, length & 0xFF, (length >> 8) & 0xFF, (length >> 16) & 0xFF, (length >> 24) & 0xFF],
-        f"Read {length} bytes from RAM",
-        length
-    )
-
+    # Relies on the arm trigger test running just before it, so there is data
     if rxdata and len(rxdata) > 0:
         print(f"  Got {len(rxdata)} bytes of RAM data")
         # Show first few bytes
-        print(f"  Data: {rxdata[:min(32, len(rxdata))].hex()}{'...' if len(rxdata) > 32 else ''}")
-        return len(rxdata) == length
+        more = '...' if len(rxdata) > 32 else ''
+        print(f"  Data: {rxdata[:32].hex()}{more}")
+        return len(rxdata) == RAM_READ_LENGTH
     return False
 
 
-# Run tests
+# Command 1: arm trigger, type=0, channel type=0, lengthtotake=16
+ARM_TRIG = bytes.fromhex('0100000010000000')
+
+# Command 0: read RAM data, rx_data[4:7] = length (32-bit LE)
+# Let's read 16 bytes (4 words)
+RAM_READ_LENGTH = 16
+RAM_READ = struct.pack('<B3xI', 0, RAM_READ_LENGTH)
+
+# Time for the acquisition to fill RAM after arming, before reading it back
+ARM_SETTLE_S = 0.1
+
+# (name, command bytes, description, response length, check)
+# Sent as one batch; the arm trigger goes last so the settle can follow it
+BATCH_TESTS = [
+    ("Get version", [2, 0], "Get command_processor version", 4, test_get_version),
+    ("Get board input", [2, 1], "Get board input status", 4, test_get_boardin),
+    ("Get event counter", [2, 3], "Get event counter", 4, test_get_event_counter),
+    ("Get lock info", [2, 5], "Get lock/clock info", 4, test_get_lock_info),
+    ("Arm trigger", ARM_TRIG, "Arm trigger (type=0, len=16)", 4, test_trigger_arm),
+]
+
+# Sent only after ARM_SETTLE_S, so never part of the batch
+RAM_TEST = ("Read RAM data", RAM_READ, f"Read {RAM_READ_LENGTH} bytes from RAM",
+            RAM_READ_LENGTH, test_read_ram_data)
+
+
+def run_test(test):
+    """Send one command and check its response."""
+    name, cmd_bytes, description, resp_len, check = test
+    return name, check(send_scope_command(cmd_bytes, description, resp_len))
+
+
+def run_sequential():
+    """Send each command and wait for its response before the next one."""
+    results = [run_test(test) for test in BATCH_TESTS]
+    time.sleep(ARM_SETTLE_S)
+    results.append(run_test(RAM_TEST))
+    return results
+
+
+def run_batched():
+    """
+    Send the commands up to the arm trigger in one transfer and read all
+    responses back under one shared deadline. The command processor answers
+    in order, so the responses are split back out by their expected lengths.
+    The RAM read follows on its own once the acquisition has settled.
+    """
+    txdata = b"".join(pad_command(cmd_bytes) for _, cmd_bytes, _, _, _ in BATCH_TESTS)
+    print(f"\nTX: {len(BATCH_TESTS)} commands, {len(txdata)} bytes in one transfer")
+    usb.send(txdata)
+
+    responses = recv_batch(usb, [resp_len for _, _, _, resp_len, _ in BATCH_TESTS])
+
+    results = []
+    for (name, cmd_bytes, description, resp_len, check), rxdata in zip(BATCH_TESTS, responses):
+        print(f"\n=== {description} ===")
+        print_rx(rxdata)
+        results.append((name, check(rxdata)))
+
+    time.sleep(ARM_SETTLE_S)
+    results.append(run_test(RAM_TEST))
+    return results
+
+
+# Run tests; --sequential sends one command at a time, for debugging
+SEQUENTIAL = '--sequential' in sys.argv[1:]
+
 print("\n" + "="*60)
 print("Testing command_processor via scope command forwarding")
 print("="*60)
 
-results = []
-
-results.append(("Get version", test_get_version()))
-results.append(("Get board input", test_get_boardin()))
-results.append(("Get event counter", test_get_event_counter()))
-results.append(("Get lock info", test_get_lock_info()))
-results.append(("Arm trigger", test_trigger_arm()))
-results.append(("Read RAM data", test_read_ram_data()))
-
-usb.close()
+results = run_sequential() if SEQUENTIAL else run_batched()
 
 # Summary
 print("\n" + "="*60)
 print("SUMMARY:")
-passed = sum(1 for _, ok in results if ok)
+passed = sum(ok for _, ok in results)
 total = len(results)
 for name, ok in results:
     status = "PASS" if ok else "FAIL"
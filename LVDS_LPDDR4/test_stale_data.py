@@ -12,19 +12,20 @@ import time
 
 sys.path.insert(0, '.')
 
-from USB_FTX232H_FT60X import USB_FTX232H_FT60X_sync245mode
+from usb_session import get_usb, close_usb
 
 # Parse timeout argument
 TIMEOUT = float(sys.argv[1]) if len(sys.argv) > 1 else 3.0
 
-print(f"Opening USB device (timeout={TIMEOUT}s)...")
-usb = USB_FTX232H_FT60X_sync245mode(device_to_open_list=(
-    ('FT60X', 'Haasoscope USB3'),
-    ('FT60X', 'FTDI SuperSpeed-FIFO Bridge')))
+print(f"Stale data check (timeout={TIMEOUT}s)")
+usb = get_usb()
 
 print("Checking for stale data...")
 
-CHUNK_SIZE = 16384
+# 1 MiB per recv: each becomes a single readPipe of that size, so the FT601
+# keeps streaming instead of stopping for a new request every 16 KiB
+CHUNK_SIZE = 1 << 20
+RX_BUF = bytearray(CHUNK_SIZE)  # stale data is only counted, so one buffer is reused
 total_stale = 0
 chunks = 0
 stop_flag = threading.Event()
@@ -36,13 +37,15 @@ def drain_thread():
     global total_stale, chunks
     try:
         while not stop_flag.is_set():
-            data = usb.recv(CHUNK_SIZE)
-            if len(data) == 0:
+            got = usb.recv_into(RX_BUF, CHUNK_SIZE)
+            if got == 0:
                 break
-            total_stale += len(data)
+            total_stale += got
             chunks += 1
             if chunks <= 3 or chunks % 100 == 0:
-                print(f"  Chunk {chunks}: {len(data)} bytes (total: {total_stale:,} bytes)")
+                print(f"  Chunk {chunks}: {got} bytes (total: {total_stale:,} bytes)")
+            if got < CHUNK_SIZE:
+                break  # a short read means recv timed out: the buffer is empty
     except Exception as e:
         print(f"  Recv error: {e}")
     finally:
@@ -66,9 +69,10 @@ while not recv_done.is_set():
 # Give thread a moment to finish
 t.join(timeout=0.5)
 
-# Close USB
+# Close USB; a drain thread may still be blocked on it, so don't hand
+# this handle to anything else
 try:
-    usb.close()
+    close_usb()
 except:
     pass
 
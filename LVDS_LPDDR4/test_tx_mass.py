@@ -9,34 +9,24 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from USB_FTX232H_FT60X import USB_FTX232H_FT60X_sync245mode
-import time
+from usb_session import get_usb
+import struct
 
 # New command code (consolidated into command_processor)
 CMD_TX_MASS = 0x20  # Was 0xFE 0x01
 
-print("Opening USB device...")
-usb = USB_FTX232H_FT60X_sync245mode(device_to_open_list=(
-    ('FT60X', 'Haasoscope USB3'),
-    ('FT60X', 'FTDI SuperSpeed-FIFO Bridge')))
+usb = get_usb()
 
 def test_tx_mass(length, description=""):
     """Send TX_MASS command and verify we get the right number of bytes back."""
     print(f"\n=== TX_MASS Test: {description} ({length} bytes) ===")
 
     # Build command: 8-byte format with length in bytes 1-4
-    txdata = bytes([CMD_TX_MASS,
-                    length & 0xFF,
-                    (length >> 8) & 0xFF,
-                    (length >> 16) & 0xFF,
-                    (length >> 24) & 0xFF,
-                    0, 0, 0])
+    txdata = struct.pack('<BI3x', CMD_TX_MASS, length)
     print(f"TX: {txdata.hex()} ({len(txdata)} total bytes)")
     usb.send(txdata)
 
-    time.sleep(0.2)
-
-    # Receive data
+    # Receive data; recv blocks until all of it arrives, no need to sleep first
     rxdata = usb.recv(length)
     print(f"RX: {rxdata[:32].hex()}{'...' if len(rxdata) > 32 else ''} ({len(rxdata)} bytes)")
 
@@ -62,8 +52,6 @@ results.append(test_tx_mass(16, "16 bytes"))
 # Test 4: 64 bytes
 results.append(test_tx_mass(64, "64 bytes"))
 
-usb.close()
-
 # Summary
 print("\n" + "="*50)
 print("SUMMARY:")
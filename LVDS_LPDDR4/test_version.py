@@ -6,15 +6,12 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from USB_FTX232H_FT60X import USB_FTX232H_FT60X_sync245mode
+from usb_session import get_usb
 
 # New command codes (consolidated into command_processor)
 CMD_GET_VERSION = 0x23  # Was 0xFE 0x04
 
-print("Opening USB device...")
-usb = USB_FTX232H_FT60X_sync245mode(device_to_open_list=(
-    ('FT60X', 'Haasoscope USB3'),
-    ('FT60X', 'FTDI SuperSpeed-FIFO Bridge')))
+usb = get_usb()
 
 print("\n=== Testing GET_VERSION Command (0x23) ===")
 print("Sending GET_VERSION command (8 bytes)...")
@@ -23,18 +20,15 @@ txdata = bytes([CMD_GET_VERSION, 0, 0, 0, 0, 0, 0, 0])
 print(f"TX: {txdata.hex()}")
 usb.send(txdata)
 
-import time
-time.sleep(0.1)
-
+# recv blocks until the response arrives, no need to sleep first
 print("Receiving 4-byte version...")
 rxdata = usb.recv(4)
 print(f"RX: {rxdata.hex()} ({len(rxdata)} bytes)")
 
 if len(rxdata) == 4:
-    version = rxdata[0] | (rxdata[1] << 8) | (rxdata[2] << 16) | (rxdata[3] << 24)
+    version = int.from_bytes(rxdata, 'little')
     print(f"Firmware Version: 0x{version:08X}")
 else:
     print(f"FAILED - Expected 4 bytes, got {len(rxdata)}")
 
-usb.close()
 print("Done!")
@@ -33,11 +33,12 @@ if __name__ == '__main__':
                     expect_len & 0xff, (expect_len >> 8) & 0xff, (expect_len >> 16) & 0xff,
                     (expect_len >> 24) & 0xff, 0, 0, 0])  # command + length + padding
 
+    data = bytearray(expect_len)  # one receive buffer, reused by every iteration
+
     time_start = time.time()
     for i in range(TEST_COUNT):
         usb.send(txdata)  # send the command + 4 bytes to usb
-        data = usb.recv(expect_len) # recv from usb
-        rx_len = len(data)
+        rx_len = usb.recv_into(data, expect_len) # recv from usb
         if i==0: print(data[0], data[1], data[2], data[3], data[4], data[5], data[6], data[7])
         total_rx_len += rx_len
         time_total = time.time() - time_start
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Shared FT60X handle for the scope test scripts
+
+Opening the device costs an enumeration and driver bind (tens to hundreds
+of ms). The test scripts take their handle from get_usb(), so when several
+of them run in one interpreter (see runall.py) the device is opened once.
+The handle is closed at interpreter exit.
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from USB_FTX232H_FT60X import USB_FTX232H_FT60X_sync245mode
+import atexit
+import time
+
+DEVICE_LIST = (
+    ('FT60X', 'Haasoscope USB3'),
+    ('FT60X', 'FTDI SuperSpeed-FIFO Bridge'))
+
+_usb = None
+
+
+def get_usb():
+    """Return the shared USB handle, opening the device on first use."""
+    global _usb
+    if _usb is None:
+        print("Opening USB device...")
+        _usb = USB_FTX232H_FT60X_sync245mode(device_to_open_list=DEVICE_LIST)
+    return _usb
+
+
+def close_usb():
+    """Close the shared handle; the next get_usb() opens the device again."""
+    global _usb
+    if _usb is not None:
+        _usb.close()
+        _usb = None
+
+
+def recv_batch(usb, lengths, timeout=2.0):
+    """
+    Receive back-to-back responses of the given lengths under one deadline.
+
+    The whole batch shares a single timeout instead of each response getting
+    its own, so a slow device costs at most one timeout per batch. Returns
+    one bytes object per expected response; any cut off by the deadline
+    come back short or empty.
+    """
+    total = sum(lengths)
+    data = bytearray()
+    deadline = time.monotonic() + timeout
+    while len(data) < total:
+        data += usb.recv(total - len(data))
+        if time.monotonic() >= deadline:
+            break
+
+    responses = []
+    offset = 0
+    for length in lengths:
+        responses.append(bytes(data[offset:offset + length]))
+        offset += length
+    return responses
+
+
+atexit.register(close_usb)
@@ -189,8 +189,8 @@ if __name__ == '__main__':
 
         f = open('cali.json', 'w')
 
-        cmd_list = ['init', 'io', 'calvl', 'wrlvl', 'gatlvl', 'rdlvl', 'wdqlvl', 'all', 'help', 'mtest4',
-                    'mtest8', 'mtest16', 'mtest32', 'mtest64', 'mtest128', 'mtest256', 'mtest512', 'mtest1024', 'mrw', 'mrr','eff']
+        cmd_list = {'init', 'io', 'calvl', 'wrlvl', 'gatlvl', 'rdlvl', 'wdqlvl', 'all', 'help', 'mtest4',
+                    'mtest8', 'mtest16', 'mtest32', 'mtest64', 'mtest128', 'mtest256', 'mtest512', 'mtest1024', 'mrw', 'mrr','eff'}
 
         show_main_menu(args.dev,freq,memtest_freq, tester_freq, cs_map, physical_rank, data_width, mem_type, mem_density)
 
@@ -316,20 +316,12 @@ if __name__ == '__main__':
                     json_file = mr.update_verf_dq_cali_file(0, json_file)
                     init.flush_phyreg_fifo()
 
-            if opt in ['mtest4','mtest8','mtest16','mtest32','mtest64','mtest128','mtest256','mtest512','mtest1024']:
+            mtest = re.fullmatch(r'mtest(\d+)', opt) if opt in cmd_list else None
+            if mtest:
 
                 drv.memtest_data(0x5555AAAA)
 
-                if opt == 'mtest4':     size = 4
-                elif opt == 'mtest8':   size = 8
-                elif opt == 'mtest16':  size = 16
-                elif opt == 'mtest32':  size = 32
-                elif opt == 'mtest64':  size = 64
-                elif opt == 'mtest128': size = 128
-                elif opt == 'mtest256': size = 256
-                elif opt == 'mtest512': size = 512
-                elif opt == 'mtest1024':size = 1024
-                else                   :size = 4
+                size = int(mtest.group(1))
                 drv.memtest_size(size)
                 drv.memtest_restart(True)
                 fail = drv.memtest_poll_done()
@@ -3,3 +3,8 @@ class FatalException(Exception):
     Raise this exception to stop the remainning stage from running
     """
 
+
+class WriteDQLevelingTimeout(FatalException):
+    """
+    Raised when write DQ leveling does not report done within the poll budget
+    """
@@ -1,3 +1,4 @@
+import os
 import sys
 import time
 import math
@@ -11,8 +12,19 @@ class initialization:
 
     def __init__(self, drv_obj):
         self.drv_obj = drv_obj
+        self.pcr_cache = {}  # (file, mtime) -> parsed (ctl_reg, pi_reg, phy_reg)
 
     def extract_pcr_write_pattern(self, file: str):
+
+        # 'init' can be run many times from the console, only re-parse when the file changes
+        key = (file, os.path.getmtime(file))
+        if key not in self.pcr_cache:
+            self.pcr_cache.clear()
+            self.pcr_cache[key] = self.parse_pcr_write_pattern(file)
+
+        return self.pcr_cache[key]
+
+    def parse_pcr_write_pattern(self, file: str):
         phy_data = []
         pi_data = []
         ctl_data = []
@@ -145,18 +157,22 @@ class initialization:
 
         LOGGER.info('Write CTL Register')
 
+        # Register dumps are in address order, so flush() sends them as bursts
         for i in range(len(ctl_reg)):
-            self.drv_obj.lpddr4_ctrl_write('CTL', ctl_reg[i][0], ctl_reg[i][1])
+            self.drv_obj.queue_write('CTL', ctl_reg[i][0], ctl_reg[i][1])
+        self.drv_obj.flush()
 
         LOGGER.info('Write PHY Register')
 
         for i in range(len(phy_reg)):
-            self.drv_obj.lpddr4_ctrl_write('PHY', phy_reg[i][0], phy_reg[i][1])
+            self.drv_obj.queue_write('PHY', phy_reg[i][0], phy_reg[i][1])
+        self.drv_obj.flush()
 
         LOGGER.info('Write PI Register')
 
         for i in range(len(pi_reg)):
-            self.drv_obj.lpddr4_ctrl_write('PI', pi_reg[i][0], pi_reg[i][1])
+            self.drv_obj.queue_write('PI', pi_reg[i][0], pi_reg[i][1])
+        self.drv_obj.flush()
 
         return True
 
@@ -13,12 +13,15 @@ if TYPE_CHECKING:
 
 class jtag_drv:
 
+    burst_max = 64  # registers per AXI burst issued by flush()
+
     def __init__(self, debug_session: DebugSession):
         self.axi_controllers = [
             debug_session.get_controller_by_name('axi0'),
             debug_session.get_controller_by_name('axi1')
         ]
         self.debug_session = debug_session
+        self.queue = []  # (is_write, type, addr, data) waiting for flush()
 
     def jtag2axi_write(self, addr: int, data: int):
 
@@ -74,6 +77,79 @@ class jtag_drv:
         else:
             return None
 
+    def lpddr4_ctrl_write_burst(self, type: str, addr: int, data: list):
+
+        # Write len(data) consecutive registers starting at addr in one AXI transfer.
+        if type == 'CTL':
+            self.axi_controllers[0].write(addr*4, list(data))
+        elif type == 'PI':
+            self.axi_controllers[0].write((addr*4)+0x2000, list(data))
+        elif type == 'PHY':
+            self.axi_controllers[0].write((addr*4)+0x4000, list(data))
+        else:
+            return None
+
+        return
+
+    def lpddr4_ctrl_read_burst(self, type: str, addr: int, count: int):
+
+        # Read count consecutive registers starting at addr in one AXI transfer.
+        if type == 'CTL':
+            return self.axi_controllers[0].read(addr*4, count)
+        elif type == 'PI':
+            return self.axi_controllers[0].read((addr*4)+0x2000, count)
+        elif type == 'PHY':
+            return self.axi_controllers[0].read((addr*4)+0x4000, count)
+        else:
+            return None
+
+    def queue_read(self, type: str, addr: int):
+
+        # Deferred until flush(), which returns the value in queue order.
+        self.queue.append((False, type, addr, None))
+
+    def queue_write(self, type: str, addr: int, data: int):
+
+        # Deferred until flush().
+        self.queue.append((True, type, addr, data))
+
+    def flush(self):
+
+        # Run the queued accesses in order and return the read results.
+        # Back-to-back accesses of the same kind to consecutive registers
+        # go out as one AXI burst, up to burst_max long and never crossing
+        # a 4KB (1024 register) boundary.
+        ops = self.queue
+        self.queue = []
+        results = []
+
+        i = 0
+        while i < len(ops):
+            is_write, type, addr, _ = ops[i]
+            j = i + 1
+            while (j < len(ops) and j - i < self.burst_max and ops[j][0] == is_write
+                   and ops[j][1] == type and ops[j][2] == addr + (j - i) and ops[j][2] % 1024 != 0):
+                j = j + 1
+
+            if is_write:
+                self.lpddr4_ctrl_write_burst(type, addr, [op[3] for op in ops[i:j]])
+            else:
+                results.extend(self.lpddr4_ctrl_read_burst(type, addr, j - i))
+            i = j
+
+        return results
+
+    def lpddr4_ctrl_rmw_burst(self, type: str, updates: list):
+
+        # updates = [(addr, keep mask, set bits), ...]
+        # All reads go out in one flush, then all writes in a second one.
+        for addr, _, _ in updates:
+            self.queue_read(type, addr)
+
+        for (addr, mask, bits), output in zip(updates, self.flush()):
+            self.queue_write(type, addr, (output & mask) | bits)
+        self.flush()
+
     def memtest_ctrl_write(self, addr: int, data: int):
 
         self.jtag2axi1_write(addr*4, data)
@@ -8,7 +8,25 @@ LOGGER = logging.getLogger('ddr_cali_tools')
 
 class read_leveling:
 
-    vref_r1_list = [21.20, 21.50, 21.80, 22.10,
+    __slots__ = ('drv_obj', 'freq', 'step')
+
+    # Per-slice PHY register addresses (slice stride is 256)
+    _OBS_SEL_ADDR = tuple(34+(256*s) for s in range(4))    # phy_rdlvl_rddqs_dq_obs_select
+    _OBS_DLY_ADDR = tuple(58+(256*s) for s in range(4))    # phy_rdlvl_rddqs_dq_le/te_dly_obs
+    _RISE_DLY_ADDR = tuple(132+(256*s) for s in range(4))  # phy_rddqs_dq0..7_rise_slave_delay
+    _FALL_DLY_ADDR = tuple(133+(256*s) for s in range(4))  # phy_rddqs_dq0..7_fall_slave_delay
+
+    # Cali file keys
+    _SLICE_KEYS = tuple(f'slice_{s}' for s in range(4))
+    _DQ_KEYS = tuple(f'dq{dq}' for dq in range(8))
+
+    # PHY pad vref ctrl [27:24] -> (device, vref range)
+    _VREF_DECODE = {0x7: ("LPDDR4", 0),   # 0111
+                    0x6: ("LPDDR4", 1),   # 0110
+                    0x9: ("LPDDR4x", 0),  # 1001
+                    0xA: ("LPDDR4x", 1)}  # 1010
+
+    vref_r1_list = (21.20, 21.50, 21.80, 22.10,
                     22.40, 22.70, 23.00, 23.30,
                     23.60, 23.90, 24.20, 24.50,
                     24.80, 25.10, 25.40, 25.70,
@@ -39,9 +57,9 @@ class read_leveling:
                     54.80, 55.10, 55.40, 55.70,
                     56.00, 56.30, 56.60, 56.90,
                     57.20, 57.50, 57.80, 58.10,
-                    58.40, 58.70, 59.00, 59.30]
+                    58.40, 58.70, 59.00, 59.30)
 
-    vref_r0_list = [11.60, 11.90, 12.20, 12.50,
+    vref_r0_list = (11.60, 11.90, 12.20, 12.50,
                     12.80, 13.10, 13.40, 13.70,
                     14.00, 14.30, 14.60, 14.90,
                     15.20, 15.50, 15.80, 16.10,
@@ -72,7 +90,7 @@ class read_leveling:
                     45.20, 45.50, 45.80, 46.10,
                     46.40, 46.70, 47.00, 47.30,
                     47.60, 47.90, 48.20, 48.50,
-                    48.80, 49.10, 49.40, 49.70]
+                    48.80, 49.10, 49.40, 49.70)
 
     def __init__(self, drv_obj, freq: int):
         self.drv_obj = drv_obj
@@ -125,37 +143,40 @@ class read_leveling:
         output = output | (val & 0xF << 24)  # PI_RDLVL_PATTERN_NUM
         self.drv_obj.lpddr4_ctrl_write('PI', 53, output)
 
-    def read_leveling_multi_pattern_enable(self):
-        output = self.drv_obj.lpddr4_ctrl_read('PI', 131)
-        output = output & 0xFFFDFFFF
-        output = output | (0x01 << 17)  # PI_RDLVL_MULTI_EN_F2
-        self.drv_obj.lpddr4_ctrl_write('PI', 131, output)
+    def _flush_pi(self, writes):
+        # writes = {PI register: (keep mask, set bits)}
+        # The registers are read and written back as one contiguous burst.
+        first = min(writes)
+        count = max(writes) - first + 1
 
-        output = self.drv_obj.lpddr4_ctrl_read('PI', 130)
-        output = output & 0xFFFDFFFD
-        output = output | (0x01 << 1)  # PI_RDLVL_MULTI_EN_F0
-        output = output | (0x01 << 17)  # PI_RDLVL_MULTI_EN_F1
-        self.drv_obj.lpddr4_ctrl_write('PI', 130, output)
+        output = list(self.drv_obj.lpddr4_ctrl_read_burst('PI', first, count))
+        for reg, (mask, bits) in writes.items():
+            output[reg-first] = (output[reg-first] & mask) | bits
 
-    def read_leveling_pattern0_enable(self):
-        output = self.drv_obj.lpddr4_ctrl_read('PI', 129)
-        output = (output & 0xFFFDFFFF) | (0x01 << 17)  # PI_RDLVL_PAT0_EN_F0
-        self.drv_obj.lpddr4_ctrl_write('PI', 129, output)
+        self.drv_obj.lpddr4_ctrl_write_burst('PI', first, output)
 
-        output = self.drv_obj.lpddr4_ctrl_read('PI', 130)
-        output = (output & 0xFFFFFDFF) | (0x01 << 9)  # PI_RDLVL_PAT0_EN_F1
-        self.drv_obj.lpddr4_ctrl_write('PI', 130, output)
+    def read_leveling_multi_pattern_enable(self):
+        writes = {}
+        writes[131] = (0xFFFDFFFF, (0x01 << 17))  # PI_RDLVL_MULTI_EN_F2
+        writes[130] = (0xFFFDFFFD, (0x01 << 1)  # PI_RDLVL_MULTI_EN_F0
+                       | (0x01 << 17))  # PI_RDLVL_MULTI_EN_F1
+        self._flush_pi(writes)
 
-        output = self.drv_obj.lpddr4_ctrl_read('PI', 131)
-        output = (output & 0xFFFFFFFD) | (0x01 << 1)  # PI_RDLVL_PAT0_EN_F2
-        self.drv_obj.lpddr4_ctrl_write('PI', 131, output)
+    def read_leveling_pattern0_enable(self):
+        writes = {}
+        writes[129] = (0xFFFDFFFF, (0x01 << 17))  # PI_RDLVL_PAT0_EN_F0
+        writes[130] = (0xFFFFFDFF, (0x01 << 9))  # PI_RDLVL_PAT0_EN_F1
+        writes[131] = (0xFFFFFFFD, (0x01 << 1))  # PI_RDLVL_PAT0_EN_F2
+        self._flush_pi(writes)
 
     def read_leveling_pattern_data(self, pattern, pat_data: int):
         self.drv_obj.lpddr4_ctrl_write('PI', (37+pattern), pat_data)
 
     def poll_read_leveling_status(self):
 
-        timeout = 0
+        # Back off from 1ms up to 0.5s between polls, giving up after ~3.5s
+        delay = 0.001
+        waited = 0
 
         while (1):
             PI_INT_STATUS = self.drv_obj.lpddr4_ctrl_read('PI', 77)
@@ -164,19 +185,17 @@ class read_leveling:
             if read_lvl_done:
                 return
 
-            if timeout > 6:
+            if waited >= 3.5:
                 raise FatalException("Read leveling time out")
 
-            time.sleep(0.5)
-            timeout = timeout + 1
+            time.sleep(delay)
+            waited = waited + delay
+            delay = min(delay*1.3, 0.5)
 
     def clean_read_leveling_status(self):
 
-        PI_INT_ACK = self.drv_obj.lpddr4_ctrl_read('PI', 78)
-
-        PI_INT_ACK = PI_INT_ACK | (0x01 << 1)
-        PI_INT_ACK = PI_INT_ACK | (0x01 << 7)
-        PI_INT_ACK = PI_INT_ACK | (0x01 << 17)
+        # PI_INT_ACK is write-1-to-clear, the current value does not matter.
+        PI_INT_ACK = (0x01 << 1) | (0x01 << 7) | (0x01 << 17)  # 0x00020082
 
         self.drv_obj.lpddr4_ctrl_write('PI', 78, PI_INT_ACK)
 
@@ -210,48 +229,30 @@ class read_leveling:
         output = self.drv_obj.lpddr4_ctrl_read('PHY', 828)
         LOGGER.info(f'DENALI_PHY_828 = {hex(output)}')
 
-    def read_read_leveling_rddqs_rise_delay_obs(self, cs, slice_mask, cali_file):
-        '''
-        # Selects which DQ/DM bit is the source for the phy_rdlvl_rddqs_le/te_dly_obs parameters
-        # 5’h0 – DQ0 rising edge
-        # 5’h1 – DQ1 rising edge
-        # 5’h2 – DQ2 rising edge
-        # 5’h3 – DQ3 rising edge
-        # 5’h4 – DQ4 rising edge
-        # 5’h5 – DQ5 rising edge
-        # 5’h6 – DQ6 rising edge
-        # 5’h7 – DQ7 rising edge
-        # 5’h8 – DQ0 falling edge
-        # 5’h9 – DQ1 falling edge
-        # 5’hA – DQ2 falling edge
-        # 5’hB – DQ3 falling edge
-        # 5’hC – DQ4 falling edge
-        # 5’hD – DQ5 falling edge
-        # 5’hE – DQ6 falling edge
-        # 5’hF – DQ7 falling edge
-        # 5’h10 – DM rising edge
-        # 5’h18 – DM falling edge
-        '''
+    def _delay_obs(self, slice_mask, mux_base, step):
+        # mux_base selects the phy_rdlvl_rddqs_dq_obs_select source, 0 for rising and 8 for falling edge.
+        # step is passed in so the per-DQ loop does not look it up on self.
+
         dqs_input_delay = []
         DQ_le_list = []
         DQ_te_list = []
         window = []
-        LOGGER.info(f'Rising Read leveling result in (ps)')
-        LOGGER.info(f'||===== DQ =====||===== MIN =====||===== MAX ====||=== CENTER ===||== EYE WIDTH ==||== EYE WIDTH% ==||')
 
         for n in range(4):
             if slice_mask & (0x01 << n):
+                base34 = self._OBS_SEL_ADDR[n]
+                base58 = self._OBS_DLY_ADDR[n]
                 for x in range(8):
-                    output = self.drv_obj.lpddr4_ctrl_read('PHY', 34+(n*256))
+                    output = self.drv_obj.lpddr4_ctrl_read('PHY', base34)
                     output = output & 0xFFE0FFFF
-                    output = output | (x << 16)
+                    output = output | ((x+mux_base) << 16)
 
-                    self.drv_obj.lpddr4_ctrl_write('PHY', 34+(n*256), output)
-                    output = self.drv_obj.lpddr4_ctrl_read('PHY', 58+(n*256))
+                    self.drv_obj.lpddr4_ctrl_write('PHY', base34, output)
+                    output = self.drv_obj.lpddr4_ctrl_read('PHY', base58)
                     DQ_te = (output >> 16) & 0x3FF
                     DQ_le = (output) & 0x3FF
                     window.append(DQ_te-DQ_le)
-                    valid_window = round((window[x+(n*8)]*self.step), 2)
+                    valid_window = round((window[x+(n*8)]*step), 2)
 
                     mini_chart = '['
                     for q in range(0, 1023, 16):
@@ -264,15 +265,13 @@ class read_leveling:
                     DQ_le_list.append(DQ_le)
                     DQ_te_list.append(DQ_te)
 
-                    start_delay = round((DQ_le*self.step), 2)
-                    end_delay = round((DQ_te*self.step), 2)
+                    start_delay = round((DQ_le*step), 2)
+                    end_delay = round((DQ_te*step), 2)
                     center = round(((start_delay+end_delay)/2), 2)
 
                     mini_chart += ']'
-                    
+
                     LOGGER.info(f'||   DQ{x+(n*8)} \t||\t{start_delay}\t ||\t{end_delay}\t ||\t{center}\t ||\t{valid_window}\t  ||\t  {int(((DQ_te-DQ_le)/256)*100)}\t    ||'.ljust(50)+mini_chart)
-                    #LOGGER.info(
-                    #    f'DQ{x+(n*8)} Rising Start = {start_delay} ps End = {end_delay} ps valid_window = {valid_window} ps'.ljust(90)+mini_chart)
 
             else:
                 for x in range(8):
@@ -281,6 +280,35 @@ class read_leveling:
                     DQ_te_list.append(int(0))
                     window.append(int(0))
 
+        return [dqs_input_delay, DQ_le_list, DQ_te_list, window]
+
+    def read_read_leveling_rddqs_rise_delay_obs(self, cs, slice_mask, cali_file):
+        '''
+        # Selects which DQ/DM bit is the source for the phy_rdlvl_rddqs_le/te_dly_obs parameters
+        # 5’h0 – DQ0 rising edge
+        # 5’h1 – DQ1 rising edge
+        # 5’h2 – DQ2 rising edge
+        # 5’h3 – DQ3 rising edge
+        # 5’h4 – DQ4 rising edge
+        # 5’h5 – DQ5 rising edge
+        # 5’h6 – DQ6 rising edge
+        # 5’h7 – DQ7 rising edge
+        # 5’h8 – DQ0 falling edge
+        # 5’h9 – DQ1 falling edge
+        # 5’hA – DQ2 falling edge
+        # 5’hB – DQ3 falling edge
+        # 5’hC – DQ4 falling edge
+        # 5’hD – DQ5 falling edge
+        # 5’hE – DQ6 falling edge
+        # 5’hF – DQ7 falling edge
+        # 5’h10 – DM rising edge
+        # 5’h18 – DM falling edge
+        '''
+        LOGGER.info(f'Rising Read leveling result in (ps)')
+        LOGGER.info(f'||===== DQ =====||===== MIN =====||===== MAX ====||=== CENTER ===||== EYE WIDTH ==||== EYE WIDTH% ==||')
+
+        [dqs_input_delay, DQ_le_list, DQ_te_list, window] = self._delay_obs(slice_mask, 0, self.step)
+
         cali_file = self.update_rdlvl_rise_cali_file(cs, slice_mask, cali_file, DQ_le_list, DQ_te_list)
 
         for n in range(4):
@@ -313,53 +341,10 @@ class read_leveling:
         # 5’h10 – DM rising edge
         # 5’h18 – DM falling edge
         '''
-        dqs_input_delay = []
-        DQ_le_list = []
-        DQ_te_list = []
-        window = []
-
         LOGGER.info(f'Falling Read leveling result in (ps)')
         LOGGER.info(f'||===== DQ =====||===== MIN =====||===== MAX ====||=== CENTER ===||== EYE WIDTH ==||== EYE WIDTH% ==||')
 
-        for n in range(4):
-            if slice_mask & (0x01 << n):
-                for x in range(8):
-                    output = self.drv_obj.lpddr4_ctrl_read('PHY', 34+(n*256))
-                    output = output & 0xFFE0FFFF
-                    output = output | ((x+8) << 16)
-
-                    self.drv_obj.lpddr4_ctrl_write('PHY', 34+(n*256), output)
-                    output = self.drv_obj.lpddr4_ctrl_read('PHY', 58+(n*256))
-                    DQ_te = (output >> 16) & 0x3FF
-                    DQ_le = (output) & 0x3FF
-                    window.append(DQ_te-DQ_le)
-                    valid_window = round((window[x+(n*8)]*self.step), 2)
-
-                    mini_chart = '['
-                    for q in range(0, 1023, 16):
-                        if (q >= DQ_le) & (q <= DQ_te):
-                            mini_chart += 'o'
-                        else:
-                            mini_chart += '-'
-
-                    dqs_input_delay.append(int((DQ_te+DQ_le)/2))
-                    DQ_le_list.append(DQ_le)
-                    DQ_te_list.append(DQ_te)
-
-                    start_delay = round((DQ_le*self.step), 2)
-                    end_delay = round((DQ_te*self.step), 2)
-                    center = round(((start_delay+end_delay)/2), 2)
-
-                    mini_chart += ']'
-                    #LOGGER.info(
-                    #    f'DQ{x+(n*8)} Falling Start = {start_delay} ps End = {end_delay} ps valid_window = {valid_window} ps'.ljust(90)+mini_chart)
-                    LOGGER.info(f'||   DQ{x+(n*8)} \t||\t{start_delay}\t ||\t{end_delay}\t ||\t{center}\t ||\t{valid_window}\t  ||\t  {int(((DQ_te-DQ_le)/256)*100)}\t    ||'.ljust(50)+mini_chart)
-            else:
-                for x in range(8):
-                    dqs_input_delay.append(int(0))
-                    DQ_le_list.append(int(0))
-                    DQ_te_list.append(int(0))
-                    window.append(int(0))
+        [dqs_input_delay, DQ_le_list, DQ_te_list, window] = self._delay_obs(slice_mask, 8, self.step)
 
         cali_file = self.update_rdlvl_fall_cali_file(cs, slice_mask, cali_file, DQ_le_list, DQ_te_list)
 
@@ -398,19 +383,11 @@ class read_leveling:
 
         for slice in range(4):
             if slice_mask & (0x01 << slice):
-                # DQ0
-                output = self.drv_obj.lpddr4_ctrl_read('PHY', 132+(slice*256))
-                output = (output >> 8) & 0x03FF
-                dqs_input_delay.append(output)
-                # LOGGER.info(f'phy_rddqs_dq0_rise_slave_delay_{slice} Delay = {output}')
-
-                # DQ1 to DQ7
+                # DQ0 in PHY 132 [17:8], DQ1 to DQ7 in PHY 133-139 [25:16], read as one burst
+                output = self.drv_obj.lpddr4_ctrl_read_burst('PHY', self._RISE_DLY_ADDR[slice], 8)
+                dqs_input_delay.append((output[0] >> 8) & 0x03FF)
                 for dq in range(7):
-                    output = self.drv_obj.lpddr4_ctrl_read(
-                        'PHY', 133+dq+(slice*256))
-                    output = (output >> 16) & 0x03FF
-                    dqs_input_delay.append(output)
-                    # LOGGER.info(f'phy_rddqs_dq{dq+1}_rise_slave_delay_{slice} Delay = {output}')
+                    dqs_input_delay.append((output[dq+1] >> 16) & 0x03FF)
 
         return dqs_input_delay
 
@@ -440,12 +417,10 @@ class read_leveling:
 
         for slice in range(4):
             if slice_mask & (0x01 << slice):
+                # DQ0 to DQ7 in PHY 133-140 [9:0], read as one burst
+                output = self.drv_obj.lpddr4_ctrl_read_burst('PHY', self._FALL_DLY_ADDR[slice], 8)
                 for dq in range(8):
-                    output = self.drv_obj.lpddr4_ctrl_read(
-                        'PHY', 133+dq+(slice*256))
-                    output = output & 0x03FF
-                    dqs_input_delay.append(output)
-                    # LOGGER.info(f'phy_rddqs_dq{dq}_fall_slave_delay_{slice} Delay = {output}')
+                    dqs_input_delay.append(output[dq] & 0x03FF)
 
         return dqs_input_delay
 
@@ -453,20 +428,19 @@ class read_leveling:
 
         for slice in range(4):
             if slice_mask & (0x01 << slice):
-                # DQ0
-                output = self.drv_obj.lpddr4_ctrl_read('PHY', 132+(slice*256))
-                output = output & ((~(0x03FF << 8)) & 0xFFFFFFFF)
-                output = output | (delay_list[0+(slice*8)] << 8)
-                self.drv_obj.lpddr4_ctrl_write('PHY', 132+(slice*256), output)
+                # DQ0 in PHY 132 [17:8], DQ1 to DQ7 in PHY 133-139 [25:16]
+                # One burst read and one burst write per slice
+                addr = self._RISE_DLY_ADDR[slice]
+                output = list(self.drv_obj.lpddr4_ctrl_read_burst('PHY', addr, 8))
+
+                output[0] = output[0] & ((~(0x03FF << 8)) & 0xFFFFFFFF)
+                output[0] = output[0] | (delay_list[0+(slice*8)] << 8)
 
-                # DQ1 to DQ7
                 for dq in range(7):
-                    output = self.drv_obj.lpddr4_ctrl_read(
-                        'PHY', 133+dq+(slice*256))
-                    output = output & ((~(0x03FF << 16)) & 0xFFFFFFFF)
-                    output = output | (delay_list[dq+1+(slice*8)] << 16)
-                    self.drv_obj.lpddr4_ctrl_write(
-                        'PHY', 133+dq+(slice*256), output)
+                    output[dq+1] = output[dq+1] & ((~(0x03FF << 16)) & 0xFFFFFFFF)
+                    output[dq+1] = output[dq+1] | (delay_list[dq+1+(slice*8)] << 16)
+
+                self.drv_obj.lpddr4_ctrl_write_burst('PHY', addr, output)
 
         self.update_slave_delay()
 
@@ -474,14 +448,16 @@ class read_leveling:
 
         for slice in range(4):
             if slice_mask & (0x01 << slice):
-                # DQ0 to DQ7
+                # DQ0 to DQ7 in PHY 133-140 [9:0]
+                # One burst read and one burst write per slice
+                addr = self._FALL_DLY_ADDR[slice]
+                output = list(self.drv_obj.lpddr4_ctrl_read_burst('PHY', addr, 8))
+
                 for dq in range(8):
-                    output = self.drv_obj.lpddr4_ctrl_read(
-                        'PHY', 133+dq+(slice*256))
-                    output = output & ((~0x03FF) & 0xFFFFFFFF)
-                    output = output | (delay_list[dq+(slice*8)])
-                    self.drv_obj.lpddr4_ctrl_write(
-                        'PHY', 133+dq+(slice*256), output)
+                    output[dq] = output[dq] & ((~0x03FF) & 0xFFFFFFFF)
+                    output[dq] = output[dq] | (delay_list[dq+(slice*8)])
+
+                self.drv_obj.lpddr4_ctrl_write_burst('PHY', addr, output)
 
         self.update_slave_delay()
 
@@ -610,14 +586,17 @@ class read_leveling:
 
         return
 
-    def set_phy_vref_initial_start_stop_point(self, start, stop):
-        output = self.drv_obj.lpddr4_ctrl_read('PHY', 97+(256*slice))
-        output = (output & 0x80FFFFFF) | (start << 24)
-        self.drv_obj.lpddr4_ctrl_write('PHY', 97+(256*slice), output)
+    def set_phy_vref_initial_start_stop_point(self, slice_mask, start, stop):
+
+        for slice in range(4):
+            if slice_mask & (1 << slice):
+                output = self.drv_obj.lpddr4_ctrl_read('PHY', 97+(256*slice))
+                output = (output & 0x80FFFFFF) | ((start & 0x7F) << 24)
+                self.drv_obj.lpddr4_ctrl_write('PHY', 97+(256*slice), output)
 
-        output = self.drv_obj.lpddr4_ctrl_read('PHY', 98+(256*slice))
-        output = (output & 0xFFFFFF80) | (stop << 0)
-        self.drv_obj.lpddr4_ctrl_write('PHY', 98+(256*slice), output)
+                output = self.drv_obj.lpddr4_ctrl_read('PHY', 98+(256*slice))
+                output = (output & 0xFFFFFF80) | ((stop & 0x7F) << 0)
+                self.drv_obj.lpddr4_ctrl_write('PHY', 98+(256*slice), output)
 
         return
 
@@ -634,18 +613,19 @@ class read_leveling:
                 output = ((self.drv_obj.lpddr4_ctrl_read(
                     'PHY', 13+(256*slice))) >> 16) & 0x7F
 
-                if rng[slice] == 0:
-                    LOGGER.info(
-                        f'Slice{slice} FPGA Vref Result = {self.vref_r0_list[output]}% Range ={rng[slice]}')
-                else:
-                    LOGGER.info(
-                        f'Slice{slice} FPGA Vref Result = {self.vref_r1_list[output]}% Range ={rng[slice]}')
+                LOGGER.info(
+                    f'Slice{slice} FPGA Vref Result = {self._vref_percent(rng[slice], output)}% Range ={rng[slice]}')
                 vref_list.append(output)
             else:
                 vref_list.append(0)
 
         return vref_list
 
+    def _vref_percent(self, rng, code):
+
+        # Vref training code -> percent of VDDQ for the pad's vref range
+        return (self.vref_r0_list if rng == 0 else self.vref_r1_list)[code]
+
     def set_phy_pad_vref_ctrl_dq(self, slice_mask, verf_list):
 
         for slice in range(4):
@@ -666,21 +646,7 @@ class read_leveling:
             if slice_mask & (1 << slice):
                 output = self.drv_obj.lpddr4_ctrl_read('PHY', 111+(256*slice))
                 output = (output >> 24) & 0xF
-                if output == 0x7:  # 0111
-                    device = "LPDDR4"
-                    rng = 0
-                elif output == 0x6:  # 0110
-                    device = "LPDDR4"
-                    rng = 1
-                elif output == 0x9:  # 1001
-                    device = "LPDDR4x"
-                    rng = 0
-                elif output == 0xA:  # 1010
-                    device = "LPDDR4x"
-                    rng = 1
-                else:
-                    device = None
-                    rng = None
+                device, rng = self._VREF_DECODE.get(output, (None, None))
 
                 dev_list.append(device)
                 rng_list.append(rng)
@@ -694,13 +660,16 @@ class read_leveling:
 
         cs = cs & 0x3
 
+        cs_file = file[f'cs{0}']
+
         for slice in range(4):
             if (slice_mask & (0x1 << slice)):
+                slice_input = cs_file[self._SLICE_KEYS[slice]]['input']
+                le_file = slice_input['left_edge']['rise']
+                re_file = slice_input['right_edge']['rise']
                 for dq in range(8):
-                    file[f'cs{0}'][f'slice_{slice}']['input']['left_edge']['rise'][f'dq{dq}'] = le_delay[dq+(
-                        slice*8)]
-                    file[f'cs{0}'][f'slice_{slice}']['input']['right_edge']['rise'][f'dq{dq}'] = re_delay[dq+(
-                        slice*8)]
+                    le_file[self._DQ_KEYS[dq]] = le_delay[dq+(slice*8)]
+                    re_file[self._DQ_KEYS[dq]] = re_delay[dq+(slice*8)]
 
         return file
 
@@ -708,13 +677,16 @@ class read_leveling:
 
         cs = cs & 0x3
 
+        cs_file = file[f'cs{0}']
+
         for slice in range(4):
             if (slice_mask & (0x1 << slice)):
+                slice_input = cs_file[self._SLICE_KEYS[slice]]['input']
+                le_file = slice_input['left_edge']['fall']
+                re_file = slice_input['right_edge']['fall']
                 for dq in range(8):
-                    file[f'cs{0}'][f'slice_{slice}']['input']['left_edge']['fall'][f'dq{dq}'] = le_delay[dq+(
-                        slice*8)]
-                    file[f'cs{0}'][f'slice_{slice}']['input']['right_edge']['fall'][f'dq{dq}'] = re_delay[dq+(
-                        slice*8)]
+                    le_file[self._DQ_KEYS[dq]] = le_delay[dq+(slice*8)]
+                    re_file[self._DQ_KEYS[dq]] = re_delay[dq+(slice*8)]
 
         return file
 
@@ -724,12 +696,11 @@ class read_leveling:
 
         rng = self.check_device_vref_range(slice_mask)
 
+        cs_file = file[f'cs{0}']
+
         for slice in range(4):
             if (slice_mask & (0x1 << slice)):
-                if rng[slice] == 0:
-                    file[f'cs{0}'][f'slice_{slice}']['vref'] = self.vref_r0_list[vref[slice]]
-                else:
-                    file[f'cs{0}'][f'slice_{slice}']['vref'] = self.vref_r1_list[vref[slice]]
+                cs_file[self._SLICE_KEYS[slice]]['vref'] = self._vref_percent(rng[slice], vref[slice])
 
         return file
 
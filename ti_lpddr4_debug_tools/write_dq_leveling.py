@@ -1,79 +1,126 @@
 import logging
 import time
 
+from excp import WriteDQLevelingTimeout
+
 LOGGER = logging.getLogger('ddr_cali_tools')
 
+# One row of the leveling result table: name, min, max, center, eye width,
+# eye width %, mini chart. Passed to LOGGER as-is so formatting is lazy.
+ROW_FMT = '||   %s \t||\t%s\t ||\t%s\t ||\t%s\t ||\t%s\t  ||\t  %s\t    ||%s'
+
 
 class write_dq_leveling:
 
+    poll_timeout = 3.5  # seconds poll_writedq_leveling_status waits for done
+
+    # Per-slice PHY register addresses (slice stride is 256)
+    _TRAINING_CTRL_ADDR = tuple(0x06+(256*s) for s in range(4))  # multicast_en, per_rank_index
+    _WDQLVL_PATT_ADDR = tuple(36+(256*s) for s in range(4))      # phy_wdqlvl_patt
+    _WDQLVL_OBS_SEL_ADDR = tuple(37+(256*s) for s in range(4))   # phy_wdqlvl_dqdm_obs_select
+    _WDQLVL_MASK_ADDR = tuple(38+(256*s) for s in range(4))      # phy_wdqlvl_datadm_mask
+    _WDQLVL_OBS_ADDR = tuple(61+(256*s) for s in range(4))       # phy_wdqlvl_dqdm_le/te_dly_obs
+    _WRDQ_DLY_ADDR = tuple(127+(256*s) for s in range(4))        # phy_clk_wrdq0..7/dm_slave_delay
+
+    # Cali file keys, results are laid out as 9 entries (DQ0-7, DM) per slice
+    _SLICE_KEYS = tuple(f'slice_{s}' for s in range(4))
+    _DQDM_KEYS = tuple(f'dq{dq}' for dq in range(8)) + ('dm',)
+
     def __init__(self, drv_obj, freq: int):
         self.drv_obj = drv_obj
         self.freq = freq
         self.step = 1/freq*1000000/512
+        self._pi_shadow = {}  # PI register -> last value written, see _read_pi
+
+    def _read_pi(self, reg):
+        # Nothing else writes these PI registers during a leveling run, so the
+        # value this class last wrote is reused instead of read back over JTAG.
+        # The shadow is dropped at the start of every run_writedq_leveling.
+        if reg not in self._pi_shadow:
+            self._pi_shadow[reg] = self.drv_obj.lpddr4_ctrl_read('PI', reg)
+        return self._pi_shadow[reg]
+
+    def _write_pi(self, reg, output):
+        self._pi_shadow[reg] = output
+        self.drv_obj.lpddr4_ctrl_write('PI', reg, output)
+
+    def _rmw_pi(self, writes):
+        # writes = {PI register: (keep mask, set bits)}
+        # Registers missing from the shadow are read in one flush, then all writes go in a second one.
+        regs = sorted(writes)
+        missing = [reg for reg in regs if reg not in self._pi_shadow]
+        for reg in missing:
+            self.drv_obj.queue_read('PI', reg)
+        self._pi_shadow.update(zip(missing, self.drv_obj.flush()))
+
+        for reg in regs:
+            mask, bits = writes[reg]
+            self._pi_shadow[reg] = (self._pi_shadow[reg] & mask) | bits
+            self.drv_obj.queue_write('PI', reg, self._pi_shadow[reg])
+        self.drv_obj.flush()
 
     def writedq_leveling_enable(self):
-
-        output = self.drv_obj.lpddr4_ctrl_read('PI', 157)
-        output = output | (0x01 << 9)  # PI_WDQLVL_EN_F0
-        self.drv_obj.lpddr4_ctrl_write('PI', 157, output)
-
-        output = self.drv_obj.lpddr4_ctrl_read('PI', 159)
-        output = output | (0x01 << 25)  # PI_WDQLVL_EN_F1
-        self.drv_obj.lpddr4_ctrl_write('PI', 159, output)
-
-        output = self.drv_obj.lpddr4_ctrl_read('PI', 162)
-        output = output | (0x01 << 9)  # PI_WDQLVL_EN_F2
-        self.drv_obj.lpddr4_ctrl_write('PI', 162, output)
+        writes = {}
+        writes[157] = (0xFFFFFFFF, (0x01 << 9))  # PI_WDQLVL_EN_F0
+        writes[159] = (0xFFFFFFFF, (0x01 << 25))  # PI_WDQLVL_EN_F1
+        writes[162] = (0xFFFFFFFF, (0x01 << 9))  # PI_WDQLVL_EN_F2
+        self._rmw_pi(writes)
 
     def writedq_leveling_disable(self):
-
-        output = self.drv_obj.lpddr4_ctrl_read('PI', 157)
-        output = output & 0xFFFFFCFF  # PI_WDQLVL_EN_F0
-        self.drv_obj.lpddr4_ctrl_write('PI', 157, output)
-
-        output = self.drv_obj.lpddr4_ctrl_read('PI', 159)
-        output = output & 0xFCFFFFFF  # PI_WDQLVL_EN_F1
-        self.drv_obj.lpddr4_ctrl_write('PI', 159, output)
-
-        output = self.drv_obj.lpddr4_ctrl_read('PI', 162)
-        output = output & 0xFFFFFCFF  # PI_WDQLVL_EN_F2
-        self.drv_obj.lpddr4_ctrl_write('PI', 162, output)
+        writes = {}
+        writes[157] = (0xFFFFFCFF, 0)  # PI_WDQLVL_EN_F0
+        writes[159] = (0xFCFFFFFF, 0)  # PI_WDQLVL_EN_F1
+        writes[162] = (0xFFFFFCFF, 0)  # PI_WDQLVL_EN_F2
+        self._rmw_pi(writes)
 
     def writedq_leveling_verf_enable(self):
 
-        output = self.drv_obj.lpddr4_ctrl_read('PI', 66)
+        output = self._read_pi(66)
         output = output | (0x01 << 16)  # PI_WDQLVL_VREF_EN
-        self.drv_obj.lpddr4_ctrl_write('PI', 66, output)
+        self._write_pi(66, output)
 
     def writedq_leveling_verf_disable(self):
 
-        output = self.drv_obj.lpddr4_ctrl_read('PI', 66)
+        output = self._read_pi(66)
         output = output & 0xFFFEFFFF  # PI_WDQLVL_VREF_EN
-        self.drv_obj.lpddr4_ctrl_write('PI', 66, output)
+        self._write_pi(66, output)
 
     def writedq_leveling_cs(self, cs):
         cs_map = cs  # [1:0] for target of CS[x], e.g:cs=1 cs1 enable
-        output = self.drv_obj.lpddr4_ctrl_read('PI', 68)
+        output = self._read_pi(68)
         output = output & 0xFCFFFFFF
         output = output | ((cs_map & 0x3) << 24)  # PI_WRLVL_CS
-        self.drv_obj.lpddr4_ctrl_write('PI', 68, output)
+        self._write_pi(68, output)
 
     def writedq_leveling_cs_map(self, cs):
         cs_map = 0x01 << cs  # [3:0] CS mask [0] for CS[0],[1] for CS[1]
-        output = self.drv_obj.lpddr4_ctrl_read('PI', 67)
+        output = self._read_pi(67)
         output = output & 0xFFF0FFFF
         output = output | ((cs_map & 0xF) << 16)  # PI_WRLVL_CS_MAP
-        self.drv_obj.lpddr4_ctrl_write('PI', 67, output)
+        self._write_pi(67, output)
 
     def writedq_leveling_req(self):
 
-        output = self.drv_obj.lpddr4_ctrl_read('PI', 68)
+        output = self._read_pi(68)
         output = output | (0x1 << 16)  # PI_WRLVL_REQ
         self.drv_obj.lpddr4_ctrl_write('PI', 68, output)
+        self._pi_shadow[68] = output & 0xFFFEFFFF  # REQ clears itself once the request is taken
+
+    def writedq_leveling_cs_and_req(self, cs):
+        # writedq_leveling_cs + writedq_leveling_req as a single PI 68 write
+        cs_map = cs  # [1:0] for target of CS[x], e.g:cs=1 cs1 enable
+        output = self._read_pi(68)
+        output = output & 0xFCFFFFFF
+        output = output | ((cs_map & 0x3) << 24)  # PI_WRLVL_CS
+        output = output | (0x1 << 16)  # PI_WRLVL_REQ
+        self.drv_obj.lpddr4_ctrl_write('PI', 68, output)
+        self._pi_shadow[68] = output & 0xFFFEFFFF  # REQ clears itself once the request is taken
 
     def poll_writedq_leveling_status(self):
 
-        timeout = 0
+        # Back off from 1ms up to 0.5s between polls, giving up after poll_timeout
+        delay = 0.001
+        waited = 0
 
         while (1):
             PI_INT_STATUS = self.drv_obj.lpddr4_ctrl_read('PI', 77)
@@ -82,118 +129,112 @@ class write_dq_leveling:
             if read_lvl_done:
                 return
 
-            if timeout > 6:
-                raise FatalException("Write DQ leveling time out")
+            if waited >= self.poll_timeout:
+                raise WriteDQLevelingTimeout("Write DQ leveling time out")
 
-            time.sleep(0.5)
-            timeout = timeout + 1
+            time.sleep(delay)
+            waited = waited + delay
+            delay = min(delay*1.3, 0.5)
 
     def clean_writedq_leveling_status(self):
 
-        PI_INT_ACK = self.drv_obj.lpddr4_ctrl_read('PI', 78)
-
-        PI_INT_ACK = PI_INT_ACK | (0x01 << 5)  # PI_WDQLVL_ERROR_BIT
+        # PI_INT_ACK is write-1-to-clear, the current value does not matter.
+        PI_INT_ACK = (0x01 << 5)  # PI_WDQLVL_ERROR_BIT
         PI_INT_ACK = PI_INT_ACK | (0x01 << 11)  # PI_WDQLVL_REQ_BIT
         PI_INT_ACK = PI_INT_ACK | (0x01 << 20)  # PI_WDQLVL_DONE_BIT
 
         self.drv_obj.lpddr4_ctrl_write('PI', 78, PI_INT_ACK)
 
     def training_multicast(self, en):
-        for slice in range(4):
-            output = self.drv_obj.lpddr4_ctrl_read('PHY', 0x06+(slice*256))
-
-            if en:
-                output = output | (1 << 8)
-            else:
-                output = output & 0xFFFFFEFF
-
-            self.drv_obj.lpddr4_ctrl_write('PHY', 0x06+(slice*256), output)
+        bits = (1 << 8) if en else 0
+        self.drv_obj.lpddr4_ctrl_rmw_burst(
+            'PHY', [(self._TRAINING_CTRL_ADDR[slice], 0xFFFFFEFF, bits) for slice in range(4)])
 
     def training_prerank_index(self, cs):
-        for slice in range(4):
-            output = self.drv_obj.lpddr4_ctrl_read('PHY', 0x06+(slice*256))
+        self.drv_obj.lpddr4_ctrl_rmw_burst(
+            'PHY', [(self._TRAINING_CTRL_ADDR[slice], 0xFFFCFFFF, (cs << 16)) for slice in range(4)])
+
+    def _mini_chart(self, DQ_le, DQ_te):
+        # One column per 24 taps (q = 0, 24, ... 1008), 'o' where le < q < te.
+        # When te has wrapped below le the passing region wraps around too.
+        # Column counts are worked out directly instead of testing every q.
+        cols = 43
+        after_le = min(DQ_le//24 + 1, cols)  # first column with q > le
+        before_te = min((DQ_te + 23)//24, cols)  # columns with q < te
 
-            output = ((output & 0xFFFCFFFF) | (cs << 16))
+        if DQ_te < DQ_le:
+            return '[' + 'o'*before_te + '-'*(after_le-before_te) + 'o'*(cols-after_le) + ']'
 
-            self.drv_obj.lpddr4_ctrl_write('PHY', 0x06+(slice*256), output)
+        fill = max(before_te-after_le, 0)
+        return '[' + '-'*after_le + 'o'*fill + '-'*(cols-after_le-fill) + ']'
 
     def read_writedq_leveling_dqdm_delay_obs(self, cs, slice_mask, cali_file):
 
-        dq_output_delay = []
-        le_list = []
-        te_list = []
-        window = []
+        # Slices left out of slice_mask stay 0
+        dq_output_delay = [0]*36
+        le_list = [0]*36
+        te_list = [0]*36
+        window = [0]*36
         LOGGER.info(f'Write DQ Leveling result in (ps)')
         LOGGER.info(f'||===== DQ =====||===== MIN =====||===== MAX ====||=== CENTER ===||== EYE WIDTH ==||== EYE WIDTH% ==||')
 
-        for slice in range(4):
-            if slice_mask & (0x01 << slice):
-                for dq in range(9):
-                    output = self.drv_obj.lpddr4_ctrl_read(
-                        'PHY', 37+(slice*256))
-                    output = output & 0xFFFFF0FF
-                    output = output | (dq << 8)
-
-                    self.drv_obj.lpddr4_ctrl_write(
-                        'PHY', 37+(slice*256), output)
-
-                    output = self.drv_obj.lpddr4_ctrl_read(
-                        'PHY', 61+(slice*256))
-                    DQ_te = (output >> 16) & 0x3FF
-                    DQ_le = (output) & 0x3FF
-
-                    # if DQ_te  < DQ_le :
-                    #    DQ_te = DQ_te +1024
-
-                    if DQ_te < DQ_le:
-                        window.append(DQ_te-DQ_le+1024)
-                    else:
-                        window.append(DQ_te-DQ_le)
-
-                    valid_window = round((window[dq+(9*slice)]*self.step), 2)
-
-                    mini_chart = '['
-
-                    if DQ_te < DQ_le:
-                        for q in range(0, 1023, 24):
-                            if (q > DQ_le) | (q < DQ_te):
-                                mini_chart += 'o'
-                            else:
-                                mini_chart += '-'
-                    else:
-                        for q in range(0, 1023, 24):
-                            if (q > DQ_le) & (q < DQ_te):
-                                mini_chart += 'o'
-                            else:
-                                mini_chart += '-'
-
-                    if DQ_te < DQ_le:
-                        DQ_te = int(DQ_te+1024)
-
-                    dq_output_delay.append(int((DQ_te+DQ_le)/2))
-                    le_list.append(int(DQ_le))
-                    te_list.append(int(DQ_te))
-
-                    mini_chart += ']'
-
-                    start_delay = round((DQ_le*self.step), 2)
-                    end_delay = round((DQ_te*self.step), 2)
-                    center = round(((start_delay + end_delay)/2), 2)
-
-                    if dq == 8:
-                        #LOGGER.info(
-                        #    f'DM{slice} Start = {start_delay} ps End = {end_delay} ps valid_window = {valid_window} ps'.ljust(80)+mini_chart)
-                            LOGGER.info(f'||   DM{slice} \t||\t{start_delay}\t ||\t{end_delay}\t ||\t{center}\t ||\t{valid_window}\t  ||\t  {int(((DQ_te-DQ_le)/256)*100)}\t    ||'.ljust(50)+mini_chart)
-                    else:
-                        #LOGGER.info(
-                            #f'DQ{dq+(slice*8)} Start = {start_delay} ps End = {end_delay} ps valid_window = {valid_window} ps'.ljust(80)+mini_chart)
-                            LOGGER.info(f'||   DQ{dq+(slice*8)} \t||\t{start_delay}\t ||\t{end_delay}\t ||\t{center}\t ||\t{valid_window}\t  ||\t  {int(((DQ_te-DQ_le)/256)*100)}\t    ||'.ljust(50)+mini_chart)
-            else:
-                for dq in range(9):
-                    dq_output_delay.append(int(0))
-                    le_list.append(int(0))
-                    te_list.append(int(0))
-                    window.append(0)
+        slices = [slice for slice in range(4) if slice_mask & (0x01 << slice)]
+
+        # Select each DQ/DM in PHY 37 [11:8] and read its le/te from PHY 61.
+        # The slices sit in disjoint register blocks, so every enabled slice
+        # is queued together and goes out in one flush
+        for slice in slices:
+            self.drv_obj.queue_read('PHY', self._WDQLVL_OBS_SEL_ADDR[slice])
+        obs_sel = self.drv_obj.flush()
+
+        for slice, output in zip(slices, obs_sel):
+            output = output & 0xFFFFF0FF
+            for dq in range(9):
+                self.drv_obj.queue_write('PHY', self._WDQLVL_OBS_SEL_ADDR[slice], output | (dq << 8))
+                self.drv_obj.queue_read('PHY', self._WDQLVL_OBS_ADDR[slice])
+        obs = self.drv_obj.flush()
+
+        for i, slice in enumerate(slices):
+            for dq in range(9):
+                output = obs[(9*i)+dq]
+                DQ_te = (output >> 16) & 0x3FF
+                DQ_le = (output) & 0x3FF
+
+                # if DQ_te  < DQ_le :
+                #    DQ_te = DQ_te +1024
+
+                n = dq+(9*slice)
+
+                if DQ_te < DQ_le:
+                    window[n] = DQ_te-DQ_le+1024
+                else:
+                    window[n] = DQ_te-DQ_le
+
+                valid_window = round((window[n]*self.step), 2)
+
+                mini_chart = self._mini_chart(DQ_le, DQ_te)
+
+                if DQ_te < DQ_le:
+                    DQ_te = int(DQ_te+1024)
+
+                dq_output_delay[n] = int((DQ_te+DQ_le)/2)
+                le_list[n] = int(DQ_le)
+                te_list[n] = int(DQ_te)
+
+                start_delay = round((DQ_le*self.step), 2)
+                end_delay = round((DQ_te*self.step), 2)
+                center = round(((start_delay + end_delay)/2), 2)
+
+                if dq == 8:
+                    #LOGGER.info(
+                    #    f'DM{slice} Start = {start_delay} ps End = {end_delay} ps valid_window = {valid_window} ps'.ljust(80)+mini_chart)
+                        LOGGER.info(ROW_FMT, f'DM{slice}', start_delay, end_delay, center, valid_window,
+                                    int(((DQ_te-DQ_le)/256)*100), mini_chart)
+                else:
+                    #LOGGER.info(
+                        #f'DQ{dq+(slice*8)} Start = {start_delay} ps End = {end_delay} ps valid_window = {valid_window} ps'.ljust(80)+mini_chart)
+                        LOGGER.info(ROW_FMT, f'DQ{dq+(slice*8)}', start_delay, end_delay, center, valid_window,
+                                    int(((DQ_te-DQ_le)/256)*100), mini_chart)
 
         cali_file = self.update_wdqlvl_cali_file(cs, slice_mask, cali_file, le_list, te_list)
 
@@ -214,54 +255,42 @@ class write_dq_leveling:
 
         dq_output_delay = []
 
-        for slice in range(4):
-            if slice_mask & (0x01 << slice):
-                output = self.drv_obj.lpddr4_ctrl_read(
-                    'PHY', 127+(slice*256))  # DQ0-1
-                dq_output_delay.append(output & 0x7FF)
-                dq_output_delay.append((output >> 16) & 0x7FF)
-
-                output = self.drv_obj.lpddr4_ctrl_read(
-                    'PHY', 128+(slice*256))  # DQ2-3
-                dq_output_delay.append(output & 0x7FF)
-                dq_output_delay.append((output >> 16) & 0x7FF)
-
-                output = self.drv_obj.lpddr4_ctrl_read(
-                    'PHY', 129+(slice*256))  # DQ4-5
-                dq_output_delay.append(output & 0x7FF)
-                dq_output_delay.append((output >> 16) & 0x7FF)
+        slices = [slice for slice in range(4) if slice_mask & (0x01 << slice)]
 
-                output = self.drv_obj.lpddr4_ctrl_read(
-                    'PHY', 130+(slice*256))  # DQ6-7
-                dq_output_delay.append(output & 0x7FF)
-                dq_output_delay.append((output >> 16) & 0x7FF)
+        # All enabled slices in one flush, 5 registers each
+        for slice in slices:
+            for reg in range(5):  # DQ0-1, DQ2-3, DQ4-5, DQ6-7, DM
+                self.drv_obj.queue_read('PHY', self._WRDQ_DLY_ADDR[slice]+reg)
+        output = self.drv_obj.flush()
 
-                output = self.drv_obj.lpddr4_ctrl_read(
-                    'PHY', 131+(slice*256))  # DM
-                dq_output_delay.append(output & 0x7FF)
-
-        # for dq in range(len(dq_output_delay)):
-        #    LOGGER.info(f'phy_clk_wrdq{dq}_slave_delay = {dq_output_delay[dq]}')
+        for i in range(len(slices)):
+            regs = output[5*i:5*i+5]
+            for reg in range(4):
+                dq_output_delay.append(regs[reg] & 0x7FF)
+                dq_output_delay.append((regs[reg] >> 16) & 0x7FF)
+            dq_output_delay.append(regs[4] & 0x7FF)
 
         return dq_output_delay
 
     # main fuction for shift delay of output write dq
     def write_phy_clk_wrdqx_slave_delay(self, slice_mask, dq_output_delay):
 
-        for slice in range(4):
-            if slice_mask & (0x01 << slice):
-                self.drv_obj.lpddr4_ctrl_write(
-                    'PHY', 127+(slice*256), dq_output_delay[1+(slice*9)] << 16 | dq_output_delay[0+(slice*9)])  # DQ0-1
-                self.drv_obj.lpddr4_ctrl_write(
-                    'PHY', 128+(slice*256), dq_output_delay[3+(slice*9)] << 16 | dq_output_delay[2+(slice*9)])  # DQ2-3
-                self.drv_obj.lpddr4_ctrl_write(
-                    'PHY', 129+(slice*256), dq_output_delay[5+(slice*9)] << 16 | dq_output_delay[4+(slice*9)])  # DQ4-5
-                self.drv_obj.lpddr4_ctrl_write(
-                    'PHY', 130+(slice*256), dq_output_delay[7+(slice*9)] << 16 | dq_output_delay[6+(slice*9)])  # DQ6-7
-                output = self.drv_obj.lpddr4_ctrl_read('PHY', 131+(slice*256))
-                output = ((output & 0xFFFFF800) | dq_output_delay[8+(slice*9)])
-                self.drv_obj.lpddr4_ctrl_write(
-                    'PHY', 131+(slice*256), output)  # DM
+        slices = [slice for slice in range(4) if slice_mask & (0x01 << slice)]
+
+        # DM register keeps its upper bits, fetch all of them in one flush
+        for slice in slices:
+            self.drv_obj.queue_read('PHY', self._WRDQ_DLY_ADDR[slice]+4)
+        dm_regs = self.drv_obj.flush()
+
+        # PHY 127-131 per slice are contiguous, so each slice goes out as one burst
+        for slice, output in zip(slices, dm_regs):
+            base = slice*9
+            for reg in range(4):  # DQ0-1, DQ2-3, DQ4-5, DQ6-7
+                self.drv_obj.queue_write('PHY', self._WRDQ_DLY_ADDR[slice]+reg,
+                                         dq_output_delay[base+(2*reg)+1] << 16 | dq_output_delay[base+(2*reg)])
+            self.drv_obj.queue_write('PHY', self._WRDQ_DLY_ADDR[slice]+4,
+                                     (output & 0xFFFFF800) | dq_output_delay[base+8])  # DM
+        self.drv_obj.flush()
 
     def update_slave_delay(self):
         output = self.drv_obj.lpddr4_ctrl_read('PHY', 1285)
@@ -286,12 +315,9 @@ class write_dq_leveling:
         '''
         mask = mask & 0x1FF
 
-        for slice in range(4):
-            if slice_mask & (0x01 << slice):
-                output = self.drv_obj.lpddr4_ctrl_read('PHY', 38+(slice*256))
-                output = output & 0xFE00FFFF
-                output = output | (mask << 16)
-                self.drv_obj.lpddr4_ctrl_write('PHY', 38+(slice*256), output)
+        self.drv_obj.lpddr4_ctrl_rmw_burst(
+            'PHY', [(self._WDQLVL_MASK_ADDR[slice], 0xFE00FFFF, (mask << 16))
+                    for slice in range(4) if slice_mask & (0x01 << slice)])
 
     def write_wdqlvl_patt(self, slice_mask, enable):
         '''
@@ -311,33 +337,28 @@ class write_dq_leveling:
         '''
         enable = enable & 0x7
 
-        for slice in range(4):
-            if slice_mask & (0x01 << slice):
-                output = self.drv_obj.lpddr4_ctrl_read('PHY', 36+(slice*256))
-                output = output & 0xFFFFF8FF
-                output = output | (enable << 8)
-                self.drv_obj.lpddr4_ctrl_write('PHY', 36+(slice*256), output)
+        self.drv_obj.lpddr4_ctrl_rmw_burst(
+            'PHY', [(self._WDQLVL_PATT_ADDR[slice], 0xFFFFF8FF, (enable << 8))
+                    for slice in range(4) if slice_mask & (0x01 << slice)])
 
     def update_wdqlvl_cali_file(self, cs, slice_mask, file, le_delay, re_delay):
 
         cs = cs & 0x3
+        cs_file = file[f'cs{0}']
+
         for slice in range(4):
             if (slice_mask & (0x1 << slice)):
-                for dq in range(8):
-                    file[f'cs{0}'][f'slice_{slice}']['output']['left_edge'][f'dq{dq}'] = le_delay[dq+(
-                        slice*9)]
-                    file[f'cs{0}'][f'slice_{slice}']['output']['right_edge'][f'dq{dq}'] = re_delay[dq+(
-                        slice*9)]
-
-                file[f'cs{0}'][f'slice_{slice}']['output']['left_edge']['dm'] = le_delay[(
-                    slice*9)+8]
-                file[f'cs{0}'][f'slice_{slice}']['output']['right_edge']['dm'] = re_delay[(
-                    slice*9)+8]
+                output = cs_file[self._SLICE_KEYS[slice]]['output']
+                base = slice*9
+                output['left_edge'].update(zip(self._DQDM_KEYS, le_delay[base:base+9]))
+                output['right_edge'].update(zip(self._DQDM_KEYS, re_delay[base:base+9]))
 
         return file
 
     def run_writedq_leveling(self, cs, slice_mask, cali_file):
 
+        self._pi_shadow.clear()
+
         # self.training_multicast(True)
         # self.training_prerank_index(cs)
         self.write_wdqlvl_datadm_mask(slice_mask, 0)
@@ -345,13 +366,14 @@ class write_dq_leveling:
         self.clean_writedq_leveling_status()
         self.writedq_leveling_enable()
         self.writedq_leveling_verf_enable()
-        self.writedq_leveling_cs(cs)
         self.writedq_leveling_cs_map(cs)
-        self.writedq_leveling_req()
+        self.writedq_leveling_cs_and_req(cs)
         self.poll_writedq_leveling_status()
         [delay, cali_file] = self.read_writedq_leveling_dqdm_delay_obs(cs, slice_mask, cali_file)
         self.write_phy_clk_wrdqx_slave_delay(slice_mask, delay)
         self.update_slave_delay()
-        self.read_phy_clk_wrdqx_slave_delay(slice_mask)
+
+        if LOGGER.isEnabledFor(logging.DEBUG):
+            LOGGER.debug(f'phy_clk_wrdqx_slave_delay = {self.read_phy_clk_wrdqx_slave_delay(slice_mask)}')
 
         return cali_file